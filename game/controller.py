@@ -0,0 +1,316 @@
+import os
+import time
+import pygame as pg
+import logging
+import gamescenes
+from lib.config import get_param
+from lib.eventbus import *
+from lib.const import *
+from lib.profiler import *
+from lib.scheduler import Scheduler
+from lib.theme import invalidate_theme
+from game.world import SIMULATION_RATE
+from localpaths import PROFILE_DIR
+from startup import load_settings, startup_timer
+
+
+def step_accumulator(accumulator: float, frame_time: float, step: float, max_ticks: int) -> tuple:
+    """
+    Advance a fixed timestep accumulator by one frame.  A tick is due for every full step in the accumulator, up to
+    max_ticks, if there's still a full step left after that the frame ran too long and the whole steps are dropped.
+    :param accumulator: float, seconds left over from the last frame
+    :param frame_time: float, seconds of game time this frame (frame time scaled by the game speed)
+    :param step: float, seconds per tick
+    :param max_ticks: int, most ticks to run this frame
+    :return: Tuple[int, float, int] ticks to run, seconds left over (always less than a step) and ticks dropped
+    """
+    accumulator += frame_time
+    ticks = 0
+    while accumulator >= step and ticks < max_ticks:
+        accumulator -= step
+        ticks += 1
+    dropped = 0
+    if accumulator >= step:
+        dropped = int(accumulator / step)
+        accumulator %= step
+    return ticks, accumulator, dropped
+
+
+class GameController(object):
+
+    # frame rate while something is happening, and while idle in dirty rendering mode
+    FRAME_RATE = 60
+    IDLE_FRAME_RATE = 20
+    # in dirty rendering mode the whole display is redrawn at least this often (ms) so anything the dirty tracking
+    # can't see still shows up eventually
+    REDRAW_INTERVAL = 500
+    # how often the caption FPS display is refreshed (ms)
+    CAPTION_INTERVAL = 1000
+    # simulation ticks per second of game time, every tick advances the simulation by the same fixed step
+    SIMULATION_RATE = SIMULATION_RATE
+    # most ticks run in one frame at 1x speed, past this the simulation slows down rather than spiralling
+    MAX_CATCH_UP_TICKS = 5
+    GAME_SPEEDS = (1, 2, 4)
+
+    def __init__(self):
+        logging.debug("Configuration loaded")
+        self.display = pg.display.set_mode((get_param('display_width'), get_param('display_height')))
+        logging.debug("Display initialized")
+        self.scenes = {}  # dict of loaded scenes
+        self.scene_types = {}  # dict of scene class names, scenes are only imported and constructed when first needed
+        self.active_scene = ''
+        self.change_scene_to = None  # if this is set, we need to change the scene
+        self.running = False
+        self.time_delta = 0.016
+        self.clock = pg.time.Clock()
+        self._last_redraw = 0
+        self._last_caption = 0
+        self._caption = None
+        self.profiler = FrameProfiler()
+        self.game_speed = 1
+        self.sim_alpha = 0.0
+        self._sim_accumulator = 0.0
+        self.scheduler = Scheduler(get_param('job_budget_ms') or 4.0)
+        logging.debug("GameController initialized")
+        startup_timer.mark('display')
+        # initialize event handling
+        bind_listener(self.quit_game, pg.QUIT)
+        bind_listener(self.change_game_scene, EVENT_CHANGE_GAME_SCENE)
+        bind_listener(self.on_key_down, pg.KEYDOWN)
+        if get_param('event_instrumentation'):
+            enable_instrumentation(get_param('event_budget_ms'))
+
+    @property
+    def current_scene(self):
+        return self.scenes[self.active_scene]
+
+    def get_scene(self, scene_name):
+        """
+        Get a scene, constructing it on first use.  A scene whose GUI went stale (the display changed while it wasn't
+        active) has its GUI rebuilt here, so this should be called before entering a scene.
+        :param scene_name: str
+        :return: GameScene
+        """
+        scene = self.scenes.get(scene_name)
+        if scene is None:
+            logging.debug(f"Constructing scene {scene_name}")
+            scene = getattr(gamescenes, self.scene_types[scene_name])(self)
+            scene.on_create()
+            self.scenes[scene_name] = scene
+        elif scene.stale:
+            scene.build_gui()
+        scene.stale = False
+        return scene
+
+    def push_to_scene(self, scene, key, value):
+        if scene in self.scene_types.keys():
+            self.get_scene(scene).local_data[key] = value
+
+    def run(self):
+        self.load_scenes()
+        startup_timer.mark('scenes')
+        self.running = True
+        logging.debug("Game loop starting")
+        profiler = self.profiler
+        while self.running:
+            profiler.start()
+            # handle the event queue processing
+            event_count = process_event_queue()
+            profiler.lap(PHASE_EVENTS)
+            if get_param('dirty_rendering'):
+                self.run_dirty_frame(event_count)
+            else:
+                self.display.fill((0, 0, 0))
+                self.current_scene.update()
+                profiler.lap(PHASE_UPDATE)
+                self.run_simulation()
+                profiler.lap(PHASE_SIMULATE)
+                self.scheduler.run()
+                profiler.lap(PHASE_JOBS)
+                self.current_scene.render(self.sim_alpha)
+                if profiler.overlay_visible:
+                    profiler.draw_overlay(self.display, self.active_scene)
+                profiler.lap(PHASE_RENDER)
+                self.time_delta = self.clock.tick(self.FRAME_RATE) / 1000
+                profiler.lap(PHASE_TICK)
+                pg.display.flip()
+                profiler.lap(PHASE_FLIP)
+            profiler.end_frame(self.active_scene)
+            self.update_caption()
+            if not startup_timer.reported:
+                startup_timer.mark('first frame')
+                startup_timer.report()
+        self.unload_scenes()
+        self.on_quit()
+        logging.debug("Game loop has ended")
+
+    def run_dirty_frame(self, event_count: int):
+        """
+        Run one frame in dirty rendering mode.  The scene is only drawn when it reports changes and only the changed
+        areas are pushed to the screen, a frame with no events and no changes drops to the idle frame rate.
+        :param event_count: int, number of events processed this frame
+        :return: None
+        """
+        profiler = self.profiler
+        scene = self.current_scene
+        scene.update()
+        profiler.lap(PHASE_UPDATE)
+        self.run_simulation()
+        profiler.lap(PHASE_SIMULATE)
+        self.scheduler.run()
+        profiler.lap(PHASE_JOBS)
+        now = pg.time.get_ticks()
+        if now - self._last_redraw >= self.REDRAW_INTERVAL:
+            scene.mark_dirty()
+        dirty_rects = scene.collect_dirty_rects()
+        if dirty_rects:
+            self._last_redraw = now
+            self.display.fill((0, 0, 0))
+            scene.render(self.sim_alpha)
+            if profiler.overlay_visible:
+                overlay_rect = profiler.draw_overlay(self.display, self.active_scene)
+                if overlay_rect is not None:
+                    dirty_rects.append(overlay_rect)
+        profiler.lap(PHASE_RENDER)
+        # waiting jobs only get time when there's a frame, don't slow them down to the idle rate
+        idle = not event_count and not dirty_rects and not self.scheduler.busy
+        self.time_delta = self.clock.tick(self.IDLE_FRAME_RATE if idle else self.FRAME_RATE) / 1000
+        profiler.lap(PHASE_TICK)
+        if dirty_rects:
+            pg.display.update(dirty_rects)
+        profiler.lap(PHASE_FLIP)
+
+    def run_simulation(self) -> int:
+        """
+        Run the fixed timestep simulation of the current scene.  Frame time (scaled by the game speed) goes into an
+        accumulator and a tick is run for every full step in it, whatever is left over becomes the render alpha.  A
+        slow frame can only cause MAX_CATCH_UP_TICKS (times the game speed) ticks, anything past that is dropped.
+        :return: int, number of ticks run
+        """
+        scene = self.current_scene
+        if not scene.SIMULATED:
+            self._sim_accumulator = 0.0
+            self.sim_alpha = 0.0
+            return 0
+        step = 1.0 / self.SIMULATION_RATE
+        frame_time = self.time_delta * self.game_speed
+        max_ticks = self.MAX_CATCH_UP_TICKS * self.game_speed
+        ticks, self._sim_accumulator, dropped = step_accumulator(self._sim_accumulator, frame_time, step, max_ticks)
+        for _ in range(ticks):
+            scene.simulate(step)
+        if dropped:
+            logging.debug(f"Simulation falling behind, dropping {dropped} ticks")
+        self.sim_alpha = self._sim_accumulator / step
+        return ticks
+
+    def set_game_speed(self, speed: int):
+        if speed not in self.GAME_SPEEDS:
+            raise ValueError(f"Unsupported game speed {speed}, expected one of {self.GAME_SPEEDS}")
+        self.game_speed = speed
+        logging.debug(f"Game speed set to {speed}x")
+
+    def update_caption(self):
+        now = pg.time.get_ticks()
+        if now - self._last_caption < self.CAPTION_INTERVAL:
+            return None
+        self._last_caption = now
+        caption = f"FPS<{int(self.clock.get_fps())}> - Scene: {self.active_scene}"
+        if self.current_scene.SIMULATED:
+            caption += f" - Speed: {self.game_speed}x"
+        if caption != self._caption:
+            self._caption = caption
+            pg.display.set_caption(caption)
+
+    def load_scenes(self):
+        logging.debug("Loading Game Scenes")
+        self.scene_types['menu'] = 'MainMenu'
+        self.scene_types['map_select'] = 'MapSelect'
+        self.scene_types['select_existing_map'] = 'SelectExistingMap'
+        self.scene_types['generate_random_map'] = 'GenerateRandomMap'
+        self.scene_types['load'] = 'LoadSavedGame'
+        self.scene_types['settings'] = 'Settings'
+        self.scene_types['editor_menu'] = 'MapEditorMenu'
+        self.scene_types['editor_load'] = 'MapEditorLoadMap'
+        self.scene_types['map_view'] = 'MapView'
+        # scenes are created when they're first entered, only the menu is needed to start
+        self.active_scene = 'menu'
+        self.get_scene(self.active_scene).on_enter()
+
+    def reload_display(self):
+        # leave the current scene first so it unbinds, it's entered again once its GUI is rebuilt
+        self.current_scene.on_exit()
+        # nuke the old display
+        self.display = None
+        # reload settings
+        load_settings()
+        # re-initialize display
+        self.display = pg.display.set_mode((get_param('display_width'), get_param('display_height')))
+        self.rebuild_scenes()
+
+    def reload_theme(self):
+        # drop the shared theme so the rebuilt GUIs load the theme file again
+        invalidate_theme()
+        self.current_scene.on_exit()
+        self.rebuild_scenes()
+
+    def rebuild_scenes(self):
+        # only the current scene is rebuilt now, the rest are rebuilt when they're next entered
+        for key, scene in self.scenes.items():
+            scene.stale = key != self.active_scene
+        self.current_scene.build_gui()
+        # re-enter the current scene to reset the event system
+        self.current_scene.on_enter()
+
+    def unload_scenes(self):
+        logging.debug("Unloading Game Scenes")
+        for key, scene in self.scenes.items():
+            scene.on_destroy()
+        self.scenes.clear()
+
+    def on_quit(self):
+        self.scheduler.cancel_all()
+        unbind_listener(self.quit_game, pg.QUIT)
+        unbind_listener(self.change_game_scene, EVENT_CHANGE_GAME_SCENE)
+        unbind_listener(self.on_key_down, pg.KEYDOWN)
+
+    def quit_game(self, e):
+        if e.type == pg.QUIT:
+            self.running = False
+
+    def change_game_scene(self, e):
+        if e.type == EVENT_CHANGE_GAME_SCENE:
+            logging.debug(f"Changing scene from {self.active_scene} to {e.to_scene}")
+            self.current_scene.on_exit()
+            self.active_scene = e.to_scene
+            self.change_scene_to = None
+            self.get_scene(e.to_scene).on_enter()
+            logging.debug("Scene change completed")
+
+    def on_key_down(self, e):
+        if e.key == pg.K_F3:
+            # toggle the frame profiler overlay
+            if self.profiler.overlay_visible:
+                self.profiler.hide_overlay()
+            else:
+                self.profiler.overlay_visible = True
+            self.current_scene.mark_dirty()
+        elif e.key == pg.K_F4:
+            # dump the frame profile
+            base_name = os.path.join(PROFILE_DIR, time.strftime('frames-%Y%m%d-%H%M%S'))
+            self.profiler.dump(base_name + '.csv')
+            self.profiler.dump(base_name + '.json')
+            if instrumentation_enabled():
+                dump_instrumentation(os.path.join(PROFILE_DIR, time.strftime('events-%Y%m%d-%H%M%S.json')))
+        elif e.key == pg.K_F5:
+            # pick up changes to the GUI theme file
+            self.reload_theme()
+        elif e.key == pg.K_F6:
+            # toggle event listener timing
+            if instrumentation_enabled():
+                disable_instrumentation()
+            else:
+                enable_instrumentation(get_param('event_budget_ms') or 8.0)
+        elif e.key == pg.K_F7:
+            # cycle the game speed
+            speeds = self.GAME_SPEEDS
+            self.set_game_speed(speeds[(speeds.index(self.game_speed) + 1) % len(speeds)])
@@ -1,4 +1,12 @@
+import json
+import logging
+import numpy as np
 from dataclasses import dataclass
+from lib.structure import ArrayGrid, TILE_DTYPE
+
+# simulation ticks per second of game time, the step the world is advanced by is 1 / SIMULATION_RATE
+SIMULATION_RATE = 30
+
 
 # Types
 # water, shore, grass, plains, hills, highlands and mountains.
@@ -46,6 +54,33 @@ tile_def = {
 }
 
 
+# properties every tile of a type shares, and per tile state that every tile has its own value for
+TYPE_PROPERTIES = ('move_type', 'move_bonus', 'can_build', 'build_bonus', 'can_grow')
+STATE_PROPERTIES = ('road_level', 'river_level')
+
+
+class TileType(object):
+    """
+    The shared properties of a tile type, built once per type from tile_def.  Tiles refer to their type rather than
+    carrying their own copy of every property.
+    """
+
+    __slots__ = ('type_id', 'desc') + TYPE_PROPERTIES
+
+    def __init__(self, type_id: int, definition: dict):
+        self.type_id = type_id
+        self.desc = definition.get('desc', 'undefined')
+        self.move_type = definition.get('move_type', MOVE_LAND)
+        self.move_bonus = definition.get('move_bonus', 0)
+        self.can_build = definition.get('can_build', False)
+        self.build_bonus = definition.get('build_bonus', 0)
+        self.can_grow = definition.get('can_grow', False)
+
+
+# type table, type id => TileType
+tile_types = {type_id: TileType(type_id, definition) for type_id, definition in tile_def.items()}
+
+
 # Tile object
 class Tile(object):
     """
@@ -62,21 +97,27 @@ class Tile(object):
     this particular shore to disable building, we can pass the keyword with a value to the constructor
 
     tile_modded = Tile(1, 10, 10, can_build=False)
+
+    A whole map of these is large, the TileManager stores a map's tiles compactly and hands out TileViews that work
+    the same way.
     """
 
+    __slots__ = ('_type_id', '_x', '_y') + TYPE_PROPERTIES + STATE_PROPERTIES
+
     def __init__(self, type_id, x, y, **kwargs):
+        tile_type = tile_types[type_id]
         self._type_id = type_id
         self._x, self._y = x, y
-        self.move_type = kwargs.get('move_type', tile_def[type_id].get('move_type', MOVE_LAND))
-        self.move_bonus = kwargs.get('move_bonus', tile_def[type_id].get('move_bonus', 0))
-        self.can_build = kwargs.get('can_build', tile_def[type_id].get('can_build', False))
-        self.build_bonus = kwargs.get('build_bonus', tile_def[type_id].get('build_bonus', 0))
+        self.move_type = kwargs.get('move_type', tile_type.move_type)
+        self.move_bonus = kwargs.get('move_bonus', tile_type.move_bonus)
+        self.can_build = kwargs.get('can_build', tile_type.can_build)
+        self.build_bonus = kwargs.get('build_bonus', tile_type.build_bonus)
         self.road_level = kwargs.get('road_level', 0)
         self.river_level = kwargs.get('river_level', 0)
-        self.can_grow = kwargs.get('can_grow', tile_def[type_id].get('can_grow', False))
+        self.can_grow = kwargs.get('can_grow', tile_type.can_grow)
 
     def get_type(self):
-        return tile_def[self._type_id].get('desc', 'undefined')
+        return tile_types[self._type_id].desc
 
     def get_type_id(self):
         return self._type_id
@@ -90,7 +131,308 @@ class Tile(object):
         return self._y
 
 
+class World(object):
+    """
+    World - version 0.1
+
+    The simulated game world, the tile map plus the game clock.  The world knows nothing about the display or the GUI,
+    whatever runs it (MapView in the game, headless.py for batch runs) advances it one fixed step at a time with tick.
+
+    Inputs are queued against the tick they should happen on and applied at the start of that tick, so a scripted run
+    gives the same world whatever speed it's run at.  An input is an action name and keyword arguments, the action is
+    looked up in input_handlers.
+
+    Attributes
+    ----------
+    map_grid : ArrayGrid
+        tile type ids, the world's own copy of the grid it was made from, share it with whatever draws the world
+    source_grid : ArrayGrid
+        the grid the world was made from, it's never written to (it may be held by the map cache)
+    tiles : TileManager
+        the map's tiles, uses map_grid as its type grid
+    tick_count : int
+        number of ticks run
+    game_time : float
+        seconds of game time simulated
+    systems : list
+        callables run every tick with (world, dt) after the inputs are applied
+    input_handlers : dict
+        action name => callable taking the input's keyword arguments
+
+    Methods
+    -------
+    generate(int, Any, dict, int) : World
+        class method, generates a random map the same way the random map scene does, optionally over worker processes
+    get_tile(int, int) : TileView
+        returns a Tile-like view of a tile
+    tick(float) : None
+        advances the world one step
+    queue_input(int, str, **kwargs) : None
+        queues an input for a tick
+    apply_input(str, **kwargs) : None
+        applies an input now
+    load_script(str) : int
+        queues the inputs in a JSON script file, returns the number queued
+    set_tile(int, int, int) : None
+        changes a tile's type
+    take_changes() : List[Tuple[int, int]]
+        returns the tiles changed since the last call
+    """
+
+    def __init__(self, map_grid: ArrayGrid, copy=True):
+        self.source_grid = map_grid
+        # the grid passed in can be shared (the map cache hands out its arrays), so tile edits go to a copy
+        self.map_grid = map_grid.copy() if copy else map_grid
+        self.tiles = TileManager(self.map_grid)
+        self.tick_count = 0
+        self.game_time = 0.0
+        self.systems = []
+        self.input_handlers = {'set_tile': self.set_tile}
+        # tick => [(action, kwargs), ...]
+        self._inputs = {}
+        self._changes = []
+
+    @classmethod
+    def generate(cls, map_size: int, seed=None, height_mapping: dict = None, workers=1) -> 'World':
+        # imported here so importing the world doesn't pull in the noise libraries
+        from lib.mapbuilder import generate_noise_grid
+        from lib.random_map_generator import RandomMapGenerator, build_height_map
+        if height_mapping is None:
+            # sliders in their starting position
+            height_mapping = RandomMapGenerator().apply_adjustments(50, 50, 50)
+        noise_field = generate_noise_grid(map_size, map_size, seed, workers=workers).array
+        # a freshly built grid isn't shared with anything
+        return cls(build_height_map(noise_field, height_mapping), copy=False)
+
+    def get_tile(self, x: int, y: int) -> 'TileView':
+        return self.tiles.get(x, y)
+
+    def tick(self, dt: float) -> None:
+        inputs = self._inputs.pop(self.tick_count, None)
+        if inputs is not None:
+            for action, kwargs in inputs:
+                self.apply_input(action, **kwargs)
+        for system in self.systems:
+            system(self, dt)
+        self.tick_count += 1
+        self.game_time += dt
+
+    def queue_input(self, tick: int, action: str, **kwargs) -> None:
+        if action not in self.input_handlers:
+            raise KeyError(f"Unknown world input {action}")
+        if tick < self.tick_count:
+            raise ValueError(f"Can't queue {action} for tick {tick}, the world is already at tick {self.tick_count}")
+        self._inputs.setdefault(tick, []).append((action, kwargs))
+
+    def apply_input(self, action: str, **kwargs) -> None:
+        self.input_handlers[action](**kwargs)
+
+    def load_script(self, file_path: str) -> int:
+        """
+        Queue the inputs in a script file.  The script is a JSON list of inputs, each one an object with the tick to
+        apply it on, the action and the action's arguments, for example:
+
+        [{"tick": 30, "action": "set_tile", "x": 10, "y": 4, "type_id": 2}]
+
+        :param file_path: str
+        :return: int, number of inputs queued
+        """
+        with open(file_path) as handle:
+            script = json.load(handle)
+        for entry in script:
+            entry = dict(entry)
+            self.queue_input(entry.pop('tick'), entry.pop('action'), **entry)
+        logging.debug(f"Queued {len(script)} inputs from {file_path}")
+        return len(script)
+
+    def set_tile(self, x: int, y: int, type_id: int) -> None:
+        self.tiles.set_type(x, y, type_id)
+        self._changes.append((x, y))
+
+    def take_changes(self) -> list:
+        changes, self._changes = self._changes, []
+        return changes
+
+
+def _tile_property(name: str) -> property:
+    return property(lambda self: self._manager.get_property(self._x, self._y, name),
+                    lambda self, value: self._manager.set_property(self._x, self._y, name, value))
+
+
+class TileView(object):
+    """
+    A Tile-like view of one tile in a TileManager.  It holds nothing but its position, reading or setting a property
+    goes through to the manager, so views are cheap to make and never go out of date.
+    """
+
+    __slots__ = ('_manager', '_x', '_y')
+
+    def __init__(self, manager: 'TileManager', x: int, y: int):
+        self._manager = manager
+        self._x, self._y = x, y
+
+    move_type = _tile_property('move_type')
+    move_bonus = _tile_property('move_bonus')
+    can_build = _tile_property('can_build')
+    build_bonus = _tile_property('build_bonus')
+    can_grow = _tile_property('can_grow')
+    road_level = _tile_property('road_level')
+    river_level = _tile_property('river_level')
+
+    def get_type(self):
+        return tile_types[self.get_type_id()].desc
+
+    def get_type_id(self):
+        return int(self._manager.types[self._x, self._y])
+
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    def __eq__(self, other):
+        return isinstance(other, TileView) and (self._manager, self._x, self._y) == (other._manager, other._x, other._y)
+
+    def __hash__(self):
+        return hash((id(self._manager), self._x, self._y))
+
+    def __repr__(self):
+        return f"TileView({self.get_type()}, {self._x}, {self._y})"
+
+
 class TileManager(object):
+    """
+    TileManager - version 1.0
+
+    Flyweight store for a map's tiles.  A Tile object per tile costs hundreds of bytes, a 1024x1024 map of them runs
+    to hundreds of MB.  Here the tile types are the only per tile value in the type grid, everything a type decides is
+    looked up in the type table (tile_types), road and river levels are one byte arrays and the rare tile that differs
+    from its type's properties keeps the difference in a sparse override table.
+
+    The type grid can be shared, the World hands its map grid in so both see the same tiles.
+
+    Attributes
+    ----------
+    types : ArrayGrid
+        tile type ids
+    road_level : ArrayGrid
+        road level of each tile
+    river_level : ArrayGrid
+        river level of each tile
+
+    Properties
+    ----------
+    width : int
+    height : int
+    override_count : int
+        number of tiles with overridden type properties
+    memory_used : int
+        approximate bytes used by the tile data
+
+    Methods
+    -------
+    get(int, int) : TileView
+        returns a view of a tile, also available as manager[x, y]
+    get_property(int, int, str) : Any
+        returns a property of a tile
+    set_property(int, int, str, Any) : None
+        sets a property of a tile, type properties are stored as overrides
+    clear_overrides(int, int) : None
+        puts a tile's type properties back to its type's values
+    set_type(int, int, int) : None
+        changes a tile's type, overrides are kept
+    property_array(str) : np.ndarray
+        returns a (height, width) array of a property for every tile
+    """
+
+    def __init__(self, types: ArrayGrid):
+        self.types = types
+        self.road_level = ArrayGrid(types.width, types.height, dtype=np.uint8)
+        self.river_level = ArrayGrid(types.width, types.height, dtype=np.uint8)
+        # (x, y) => {property name => value}, only for tiles that differ from their type
+        self._overrides = {}
+
+    @classmethod
+    def create(cls, width: int, height: int, type_id=TILE_WATER) -> 'TileManager':
+        return cls(ArrayGrid(width, height, dtype=TILE_DTYPE, fill=type_id))
+
+    @property
+    def width(self) -> int:
+        return self.types.width
+
+    @property
+    def height(self) -> int:
+        return self.types.height
+
+    @property
+    def override_count(self) -> int:
+        return len(self._overrides)
+
+    @property
+    def memory_used(self) -> int:
+        # the override dicts are estimated, a few hundred bytes each is about right for a small dict and its key
+        return self.types.array.nbytes + self.road_level.array.nbytes + self.river_level.array.nbytes + \
+            len(self._overrides) * 300
+
+    def get(self, x: int, y: int) -> TileView:
+        if not (0 <= x < self.types.width and 0 <= y < self.types.height):
+            raise IndexError(f"Tile {x}, {y} is outside of the {self.types.width}x{self.types.height} map")
+        return TileView(self, x, y)
+
+    def __getitem__(self, coord) -> TileView:
+        return self.get(*coord)
+
+    def get_property(self, x: int, y: int, name: str):
+        if name in STATE_PROPERTIES:
+            return int(getattr(self, name)[x, y])
+        overrides = self._overrides.get((x, y))
+        if overrides is not None and name in overrides:
+            return overrides[name]
+        return getattr(tile_types[int(self.types[x, y])], name)
+
+    def set_property(self, x: int, y: int, name: str, value) -> None:
+        if name in STATE_PROPERTIES:
+            getattr(self, name)[x, y] = value
+            return None
+        if name not in TYPE_PROPERTIES:
+            raise AttributeError(f"Tiles have no property {name}")
+        overrides = self._overrides.get((x, y))
+        if value == getattr(tile_types[int(self.types[x, y])], name):
+            # back to the type's value, drop the override so the table stays sparse
+            if overrides is not None:
+                overrides.pop(name, None)
+                if not overrides:
+                    del self._overrides[(x, y)]
+        elif overrides is None:
+            self._overrides[(x, y)] = {name: value}
+        else:
+            overrides[name] = value
+
+    def clear_overrides(self, x: int, y: int) -> None:
+        self._overrides.pop((x, y), None)
+
+    def set_type(self, x: int, y: int, type_id: int) -> None:
+        if type_id not in tile_types:
+            raise ValueError(f"Unknown tile type {type_id}")
+        self.types[x, y] = type_id
 
-    def __init__(self):
-        pass
+    def property_array(self, name: str) -> np.ndarray:
+        """
+        Get a property for every tile at once, type properties are looked up for the whole map in one go through the
+        type table and then the overrides are applied
+        :param name: str, property name
+        :return: np.ndarray shaped (height, width)
+        """
+        if name in STATE_PROPERTIES:
+            return getattr(self, name).array.copy()
+        if name not in TYPE_PROPERTIES:
+            raise AttributeError(f"Tiles have no property {name}")
+        table = np.array([getattr(tile_types.get(i), name, 0) for i in range(max(tile_types) + 1)])
+        values = table[self.types.array]
+        for (x, y), overrides in self._overrides.items():
+            if name in overrides:
+                values[y, x] = overrides[name]
+        return values
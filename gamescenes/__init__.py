@@ -1,8 +1,36 @@
-from .main_menu import MainMenu
-from .map_select import MapSelect
-from .select_existing_map import SelectExistingMap
-from .generate_random_map import GenerateRandomMap
-from .settings import Settings
-from .editor_menu import MapEditorMenu
-from .editor_load_map import MapEditorLoadMap
-from .load_game import LoadSavedGame
+"""
+Game scenes
+
+Scenes are imported the first time they're asked for (gamescenes.MainMenu etc.), not when the package is imported.
+Each scene pulls in its pygame_gui elements and whatever map code it needs, none of which is wanted until the scene is
+actually shown.
+"""
+import importlib
+
+
+__all__ = ['MainMenu', 'MapSelect', 'SelectExistingMap', 'GenerateRandomMap', 'Settings', 'MapEditorMenu',
+           'MapEditorLoadMap', 'LoadSavedGame', 'MapView']
+
+
+# scene class name => module it's defined in
+_scene_modules = {
+    'MainMenu': '.main_menu',
+    'MapSelect': '.map_select',
+    'SelectExistingMap': '.select_existing_map',
+    'GenerateRandomMap': '.generate_random_map',
+    'Settings': '.settings',
+    'MapEditorMenu': '.editor_menu',
+    'MapEditorLoadMap': '.editor_load_map',
+    'LoadSavedGame': '.load_game',
+    'MapView': '.map_view'
+}
+
+
+def __getattr__(name):
+    module_name = _scene_modules.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    scene_class = getattr(importlib.import_module(module_name, __name__), name)
+    # cache it on the package so this is only hit once per scene
+    globals()[name] = scene_class
+    return scene_class
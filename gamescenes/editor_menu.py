@@ -15,11 +15,8 @@ class MapEditorMenu(GameScene):
 
     def on_enter(self):
         super().on_enter()
-        bind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-
-    def on_exit(self):
-        super().on_exit()
-        unbind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_back', self.on_back_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_load', self.on_load_click, GUI_BUTTON_PRESSED)
 
     def build_gui(self):
         super().build_gui()
@@ -42,10 +39,9 @@ class MapEditorMenu(GameScene):
         button_rect.y += get_param('element_height') + get_param('element_padding')
         self.ui_elements['btn_back'] = UIButton(button_rect, "Back", self.gui, self.ui_elements['panel'])
 
-    def on_button_click(self, event):
-        if event.type == GUI_BUTTON_PRESSED:
-            if event.ui_element == self.ui_elements['btn_back']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
-            elif event.ui_element == self.ui_elements['btn_load']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='editor_load')
+    def on_back_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
+
+    def on_load_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='editor_load')
 
@@ -1,12 +1,19 @@
 import logging
 from pygame import Rect, Surface
+from pygame.transform import smoothscale
 from pygame_gui.elements import UIPanel, UILabel, UIButton, UIDropDownMenu, UITextEntryLine, UIImage, UIHorizontalSlider
 from lib.base import GameScene
-from lib.const import GUI_BUTTON_PRESSED, EVENT_CHANGE_GAME_SCENE
+from lib.const import GUI_BUTTON_PRESSED, EVENT_CHANGE_GAME_SCENE, GUI_TEXT_ENTRY_CHANGED, GUI_DROP_DOWN_CHANGED, \
+    GUI_H_SLIDER_CHANGED, MAP_GEN_PROGRESS, MAP_GEN_COMPLETE, MAP_GEN_CANCELLED, MAP_GEN_FAILED
 from lib.eventbus import *
 from lib.config import get_param
 from lib.generate import gen_int_string
-from lib.mapbuilder import generate_noise_grid, generate_height_grid
+from lib.mapbuilder import generate_noise_grid, NOISE_SCALE, NOISE_PARAMS
+from lib.mapcache import MapCache, make_key
+from lib.render import render_tile_preview
+from lib.random_map_generator import RandomMapGenerator, build_height_map
+from lib.structure import ArrayGrid
+from lib.worker import BackgroundWorker
 
 
 class GenerateRandomMap(GameScene):
@@ -15,19 +22,32 @@ class GenerateRandomMap(GameScene):
         super().__init__(game_ref, 'generate_random_map')
         self.pv_img = None
         self.map_grid = None
-        # colors for representing terrain types
-        self._c_map = {
-            0: (40, 53, 147), 1: (255, 204, 128), 2: (43, 175, 43), 3: (85, 139, 47), 4: (158, 157, 36),
-            5: (141, 110, 99), 6: (66, 66, 66)
-        }
+        # raw noise for the current seed and size, slider changes only need to re-classify this
+        self.noise_field = None
+        self.noise_key = None
+        self.map_generator = RandomMapGenerator()
+        # generated noise and height maps are cached so flipping back to a seed doesn't regenerate it
+        self.map_cache = MapCache()
+        # map generation runs in the background so the game loop keeps going while a large map is built
+        self.worker = BackgroundWorker(MAP_GEN_PROGRESS, MAP_GEN_COMPLETE, MAP_GEN_CANCELLED, MAP_GEN_FAILED)
 
     def on_enter(self):
         super().on_enter()
-        bind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_back', self.on_back_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_rnd_seed', self.on_random_seed_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_preview', self.on_preview_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_next', self.on_next_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('input_seed', self.on_input_changed, GUI_TEXT_ENTRY_CHANGED)
+        self.bind_element_listener('dd_map_size', self.on_input_changed, GUI_DROP_DOWN_CHANGED)
+        for slider in ('hs_water', 'hs_grass', 'hs_mountain'):
+            # a drag moves the slider many times a frame, the height map only needs redoing for the last position
+            self.bind_element_listener(slider, self.on_slider_changed, GUI_H_SLIDER_CHANGED, coalesce=COALESCE_LATEST)
+        bind_listener(self.on_map_generation, MAP_GEN_PROGRESS, MAP_GEN_COMPLETE, MAP_GEN_CANCELLED, MAP_GEN_FAILED)
 
     def on_exit(self):
         super().on_exit()
-        unbind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
+        unbind_listener(self.on_map_generation, MAP_GEN_PROGRESS, MAP_GEN_COMPLETE, MAP_GEN_CANCELLED, MAP_GEN_FAILED)
+        self.cancel_generation()
 
     def on_create(self):
         self.pv_img = Surface((256, 256)).convert()
@@ -54,7 +74,7 @@ class GenerateRandomMap(GameScene):
         label_rect.centerx = 125
         dd_rect.centerx = 325
         self.ui_elements['d_size_label'] = UILabel(label_rect, "Map Size", self.gui, self.ui_elements['panel'])
-        self.ui_elements['dd_map_size'] = UIDropDownMenu(['64', '128', '256'], '64', dd_rect, self.gui,
+        self.ui_elements['dd_map_size'] = UIDropDownMenu(['64', '128', '256', '512', '1024'], '64', dd_rect, self.gui,
                                                          self.ui_elements['panel'])
         # Seed
         label_rect.y += get_param('element_height') + get_param('element_padding')
@@ -108,15 +128,79 @@ class GenerateRandomMap(GameScene):
         pv_rect.y = button_rect.bottom + get_param('element_padding')
         self.ui_elements['pv_image'] = UIImage(pv_rect, self.pv_img, self.gui, self.ui_elements['panel'])
 
-    def on_button_click(self, event):
-        if event.type == GUI_BUTTON_PRESSED:
-            if event.ui_element == self.ui_elements['btn_back']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='map_select')
-            elif event.ui_element == self.ui_elements['btn_rnd_seed']:
-                self.ui_elements['input_seed'].set_text("")  # clear anything in there
-                self.ui_elements['input_seed'].set_text(gen_int_string(10))
-            elif event.ui_element == self.ui_elements['btn_preview']:
-                self.generate_map_preview()
+    def on_back_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='map_select')
+
+    def on_random_seed_click(self, event):
+        # set_text doesn't post a change event, so cancel any job for the old seed here
+        self.cancel_generation()
+        self.ui_elements['input_seed'].set_text("")  # clear anything in there
+        self.ui_elements['input_seed'].set_text(gen_int_string(10))
+
+    def on_preview_click(self, event):
+        self.generate_map_preview()
+
+    def on_next_click(self, event):
+        if self.map_grid is not None:
+            self.shared_data['map_grid'] = self.map_grid
+            post_event(EVENT_CHANGE_GAME_SCENE, to_scene='map_view')
+
+    def on_input_changed(self, event):
+        # a new seed or map size makes a map that's still being generated stale
+        self.cancel_generation()
+
+    def on_slider_changed(self, event):
+        # the noise doesn't change with the sliders, so if we have it we only need to redo the height mapping
+        if self.noise_field is not None:
+            self.update_height_map()
+
+    def on_map_generation(self, event):
+        # ignore anything from a job that's been replaced or cancelled
+        if event.job_id != self.worker.current_job:
+            return None
+        if event.type == MAP_GEN_PROGRESS:
+            self.ui_elements['btn_preview'].set_text(f"Generating {int(event.progress * 100)}%")
+        elif event.type == MAP_GEN_COMPLETE:
+            self.ui_elements['btn_preview'].set_text("Generate Preview")
+            self.noise_key, self.noise_field = event.result
+            self.update_height_map()
+        elif event.type == MAP_GEN_FAILED:
+            self.ui_elements['btn_preview'].set_text("Generate Preview")
+            logging.error(f"Map generation failed: {event.error}")
+
+    def cancel_generation(self):
+        if self.worker.busy:
+            self.worker.cancel()
+            self.ui_elements['btn_preview'].set_text("Generate Preview")
+
+    @staticmethod
+    def noise_cache_key(map_size: int, map_seed) -> str:
+        return make_key('noise', size=map_size, seed=map_seed, scale=NOISE_SCALE, params=NOISE_PARAMS)
+
+    @staticmethod
+    def height_cache_key(map_size: int, map_seed, height_map) -> str:
+        return make_key('height', size=map_size, seed=map_seed, scale=NOISE_SCALE, params=NOISE_PARAMS,
+                        height_map=height_map)
+
+    def build_noise(self, progress, map_size: int, map_seed):
+        # runs on the worker thread
+        noise_field = generate_noise_grid(map_size, map_size, map_seed, progress=progress).array
+        self.map_cache.put(self.noise_cache_key(map_size, map_seed), noise_field)
+        return (map_size, map_seed), noise_field
+
+    def update_height_map(self):
+        height_map = self.map_generator.apply_adjustments(self.ui_elements['hs_water'].get_current_value(),
+                                                          self.ui_elements['hs_grass'].get_current_value(),
+                                                          self.ui_elements['hs_mountain'].get_current_value())
+        cache_key = self.height_cache_key(*self.noise_key, height_map)
+        heights = self.map_cache.get(cache_key)
+        if heights is None:
+            self.map_grid = build_height_map(self.noise_field, height_map)
+            # rebuilding from the noise field is cheap, not worth a disk write on the UI thread
+            self.map_cache.put(cache_key, self.map_grid.array, disk=False)
+        else:
+            self.map_grid = ArrayGrid.from_array(heights)
+        self.draw_map_preview()
 
     def generate_map_preview(self):
         map_seed = self.ui_elements['input_seed'].get_text()
@@ -133,16 +217,22 @@ class GenerateRandomMap(GameScene):
             map_size = int(map_size)
         else:
             raise TypeError(f"Got a non-numeric map size: {map_size}")
-        self.map_grid = generate_height_grid(generate_noise_grid(map_size, map_size, map_seed))
-        self.pv_img.fill((0, 0, 0))
-        # okay, should have a height grid now, let's make the image
-        # we also want to offset the image so it's centered in the preview area, so we'll need to adjust the X/Y
-        # values of the image according to the offset from 256
-        x_off = (256 - self.map_grid.width) // 2
-        y_off = (256 - self.map_grid.height) // 2
-        for y in range(self.map_grid.height):
-            for x in range(self.map_grid.width):
-                self.pv_img.set_at((x+x_off, y+y_off), self._c_map[self.map_grid[(x, y)]])
-        # reload PV image element
-        pv_rect = self.ui_elements['pv_image'].relative_rect
-        self.ui_elements['pv_image'] = UIImage(pv_rect, self.pv_img, self.gui, self.ui_elements['panel'])
+        if self.noise_key == (map_size, map_seed):
+            # same seed and size as the noise we already have
+            self.update_height_map()
+            return None
+        noise_field = self.map_cache.get(self.noise_cache_key(map_size, map_seed))
+        if noise_field is not None:
+            self.cancel_generation()
+            self.noise_key, self.noise_field = (map_size, map_seed), noise_field
+            self.update_height_map()
+            return None
+        self.ui_elements['btn_preview'].set_text("Generating 0%")
+        self.worker.submit(self.build_noise, map_size, map_seed)
+
+    def draw_map_preview(self):
+        # draw the whole map into the preview surface in one go, maps larger than the preview get scaled down
+        render_tile_preview(self.map_grid.array, self.pv_img)
+        # update the existing image element rather than building a new one each time
+        pv_image = self.ui_elements['pv_image']
+        pv_image.set_image(smoothscale(self.pv_img, pv_image.rect.size))
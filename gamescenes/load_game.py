@@ -15,13 +15,10 @@ class LoadSavedGame(GameScene):
 
     def on_enter(self):
         super().on_enter()
-        bind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-        bind_listener(self.on_select_changed, GUI_SELECT_CHANGED, GUI_SELECT_DROPPED)
-
-    def on_exit(self):
-        super().on_exit()
-        unbind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-        unbind_listener(self.on_select_changed, GUI_SELECT_CHANGED, GUI_SELECT_DROPPED)
+        self.bind_element_listener('btn_back', self.on_back_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_delete', self.on_delete_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_load', self.on_load_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('game_select', self.on_select_changed, GUI_SELECT_CHANGED, GUI_SELECT_DROPPED)
 
     def build_gui(self):
         super().build_gui()
@@ -54,18 +51,18 @@ class LoadSavedGame(GameScene):
         button_rect.y += get_param('element_height') + get_param('element_padding')
         self.ui_elements['btn_back'] = UIButton(button_rect, "Back", self.gui, self.ui_elements['panel'])
 
-    def on_button_click(self, event):
-        if event.type == GUI_BUTTON_PRESSED:
-            if event.ui_element == self.ui_elements['btn_back']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
-            elif event.ui_element == self.ui_elements['btn_delete']:
-                if self.ui_elements['game_select'].get_single_selection() is not None:
-                    # TODO we need to have some kind of "Are you sure?" option in here
-                    pass
-            elif event.ui_element == self.ui_elements['btn_load']:
-                if self.ui_elements['game_select'].get_single_selection() is not None:
-                    # TODO load the map and move to the editor
-                    pass
+    def on_back_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
+
+    def on_delete_click(self, event):
+        if self.ui_elements['game_select'].get_single_selection() is not None:
+            # TODO we need to have some kind of "Are you sure?" option in here
+            pass
+
+    def on_load_click(self, event):
+        if self.ui_elements['game_select'].get_single_selection() is not None:
+            # TODO load the map and move to the editor
+            pass
 
     def on_select_changed(self, event):
         if event.type == GUI_SELECT_CHANGED:
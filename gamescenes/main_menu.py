@@ -15,11 +15,11 @@ class MainMenu(GameScene):
 
     def on_enter(self):
         super().on_enter()
-        bind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-
-    def on_exit(self):
-        super().on_exit()
-        unbind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_quit', self.on_quit_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_new', self.on_new_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_load', self.on_load_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_editor', self.on_editor_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_settings', self.on_settings_click, GUI_BUTTON_PRESSED)
 
     def build_gui(self):
         super().build_gui()
@@ -46,16 +46,18 @@ class MainMenu(GameScene):
         button_rect.y += get_param('element_height') + get_param('element_padding')
         self.ui_elements['btn_quit'] = UIButton(button_rect, "Quit Game", self.gui, self.ui_elements['panel'])
 
-    def on_button_click(self, event):
-        if event.type == GUI_BUTTON_PRESSED:
-            if event.ui_element == self.ui_elements['btn_quit']:
-                post_event(QUIT)
-            elif event.ui_element == self.ui_elements['btn_new']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='map_select')
-            elif event.ui_element == self.ui_elements['btn_load']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='load')
-            elif event.ui_element == self.ui_elements['btn_editor']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='editor_menu')
-            elif event.ui_element == self.ui_elements['btn_settings']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='settings')
+    def on_quit_click(self, event):
+        post_event(QUIT)
+
+    def on_new_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='map_select')
+
+    def on_load_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='load')
+
+    def on_editor_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='editor_menu')
+
+    def on_settings_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='settings')
 
@@ -14,11 +14,8 @@ class MapSelect(GameScene):
 
     def on_enter(self):
         super().on_enter()
-        bind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-
-    def on_exit(self):
-        super().on_exit()
-        unbind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_back', self.on_back_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_next', self.on_next_click, GUI_BUTTON_PRESSED)
 
     def build_gui(self):
         super().build_gui()
@@ -51,13 +48,12 @@ class MapSelect(GameScene):
         btn_rect.y = dd_rect.bottom + get_param('element_padding')
         self.ui_elements['btn_next'] = UIButton(btn_rect, "Next", self.gui, self.ui_elements['panel'])
 
-    def on_button_click(self, event):
-        if event.type == GUI_BUTTON_PRESSED:
-            if event.ui_element == self.ui_elements['btn_back']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
-            elif event.ui_element == self.ui_elements['btn_next']:
-                print(f"Next: >{self.ui_elements['l_dd_game_map'].selected_option}")
-                if self.ui_elements['l_dd_game_map'].selected_option == 'Existing':
-                    post_event(EVENT_CHANGE_GAME_SCENE, to_scene='select_existing_map')
-                elif self.ui_elements['l_dd_game_map'].selected_option == 'Random':
-                    post_event(EVENT_CHANGE_GAME_SCENE, to_scene='generate_random_map')
+    def on_back_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
+
+    def on_next_click(self, event):
+        print(f"Next: >{self.ui_elements['l_dd_game_map'].selected_option}")
+        if self.ui_elements['l_dd_game_map'].selected_option == 'Existing':
+            post_event(EVENT_CHANGE_GAME_SCENE, to_scene='select_existing_map')
+        elif self.ui_elements['l_dd_game_map'].selected_option == 'Random':
+            post_event(EVENT_CHANGE_GAME_SCENE, to_scene='generate_random_map')
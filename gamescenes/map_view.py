@@ -0,0 +1,131 @@
+import logging
+import pygame as pg
+from pygame import Rect
+from pygame_gui.elements import UIButton, UILabel
+from lib.base import GameScene
+from lib.const import GUI_BUTTON_PRESSED, EVENT_CHANGE_GAME_SCENE
+from lib.eventbus import *
+from lib.config import get_param
+from lib.render import TileMapRenderer
+from game.world import World
+
+
+class MapView(GameScene):
+    """
+    Scrollable view of the current map, the map is passed in through shared_data['map_grid'].  Arrow keys or WASD
+    scroll the camera, so does dragging with the right mouse button, escape goes back.  The tile under the mouse is shown
+    next to the back button.
+
+    The scene runs the world simulation, the world is kept in shared_data['world'] so it carries on from where it was
+    when the scene is entered again with the same map.
+    """
+
+    SIMULATED = True
+
+    # camera speed in pixels per second
+    SCROLL_SPEED = 1200
+
+    def __init__(self, game_ref):
+        super().__init__(game_ref, 'map_view')
+        self.renderer = None
+        self.camera = None
+        self.hover_tile = None
+        self.world = None
+
+    def on_enter(self):
+        super().on_enter()
+        self.bind_element_listener('btn_back', self.on_back_click, GUI_BUTTON_PRESSED)
+        bind_listener(self.on_key_down, pg.KEYDOWN)
+        # mouse motion comes in far faster than frames, merge it into one event per frame with the drag distance summed
+        bind_listener(self.on_mouse_motion, pg.MOUSEMOTION, coalesce=Coalesce(merge=('rel',)))
+        map_grid = self.shared_data.get('map_grid')
+        if map_grid is None:
+            logging.warning("Map view entered without a map")
+            self.renderer = None
+            self.world = None
+            return None
+        self.world = self.shared_data.get('world')
+        if self.world is None or self.world.source_grid is not map_grid:
+            self.world = World(map_grid)
+            self.shared_data['world'] = self.world
+        # draw the world's copy of the map, that's the one tile changes go to
+        self.renderer = TileMapRenderer(self.world.map_grid)
+        self.camera = self.display.get_rect()
+
+    def on_exit(self):
+        super().on_exit()
+        unbind_listener(self.on_key_down, pg.KEYDOWN)
+        unbind_listener(self.on_mouse_motion, pg.MOUSEMOTION)
+        # chunk surfaces can be large, don't hang on to them while we're not being shown
+        self.renderer = None
+
+    def build_gui(self):
+        super().build_gui()
+        button_rect = Rect(get_param('element_padding'), get_param('element_padding'), 100, get_param('element_height'))
+        self.ui_elements['btn_back'] = UIButton(button_rect, "Back", self.gui)
+        label_rect = Rect(button_rect.right + get_param('element_padding'), button_rect.y, 200, button_rect.h)
+        self.ui_elements['lbl_tile'] = UILabel(label_rect, "", self.gui)
+        self.hover_tile = None
+        if self.camera is not None:
+            self.camera.size = self.display.get_size()
+
+    def update(self):
+        super().update()
+        if self.renderer is None:
+            return None
+        keys = pg.key.get_pressed()
+        step = int(self.SCROLL_SPEED * self.time_delta)
+        d_x = (keys[pg.K_RIGHT] or keys[pg.K_d]) - (keys[pg.K_LEFT] or keys[pg.K_a])
+        d_y = (keys[pg.K_DOWN] or keys[pg.K_s]) - (keys[pg.K_UP] or keys[pg.K_w])
+        if self.move_camera(d_x * step, d_y * step):
+            # the map moved under the mouse
+            self.update_hover_tile(pg.mouse.get_pos())
+
+    def move_camera(self, d_x: int, d_y: int) -> bool:
+        last_pos = self.camera.topleft
+        self.camera.move_ip(d_x, d_y)
+        world_w, world_h = self.renderer.world_size
+        self.camera.clamp_ip(Rect(0, 0, max(world_w, self.camera.w), max(world_h, self.camera.h)))
+        if self.camera.topleft == last_pos:
+            return False
+        # the map is drawn outside of the GUI so the dirty tracking can't see it move
+        self.mark_dirty()
+        return True
+
+    def update_hover_tile(self, mouse_pos):
+        tile = self.renderer.tile_at(mouse_pos, self.camera) if self.renderer is not None else None
+        if tile == self.hover_tile:
+            return None
+        self.hover_tile = tile
+        if tile is None:
+            self.ui_elements['lbl_tile'].set_text("")
+        else:
+            self.ui_elements['lbl_tile'].set_text("Tile {}, {}: {}".format(tile[0], tile[1],
+                                                                          self.renderer.tiles[tile[1], tile[0]]))
+
+    def simulate(self, dt):
+        if self.world is None:
+            return None
+        self.world.tick(dt)
+        changes = self.world.take_changes()
+        if changes:
+            for x, y in changes:
+                self.renderer.invalidate(x, y)
+            self.mark_dirty()
+
+    def render(self, alpha=0.0):
+        if self.renderer is not None:
+            self.renderer.render(self.display, self.camera)
+        super().render(alpha)
+
+    def on_back_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='generate_random_map')
+
+    def on_mouse_motion(self, event):
+        if self.renderer is not None and event.buttons[2]:
+            self.move_camera(-event.rel[0], -event.rel[1])
+        self.update_hover_tile(event.pos)
+
+    def on_key_down(self, event):
+        if event.key == pg.K_ESCAPE:
+            post_event(EVENT_CHANGE_GAME_SCENE, to_scene='generate_random_map')
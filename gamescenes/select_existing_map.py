@@ -15,13 +15,9 @@ class SelectExistingMap(GameScene):
 
     def on_enter(self):
         super().on_enter()
-        bind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-        bind_listener(self.on_select_changed, GUI_SELECT_CHANGED, GUI_SELECT_DROPPED)
-
-    def on_exit(self):
-        super().on_exit()
-        unbind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-        unbind_listener(self.on_select_changed, GUI_SELECT_CHANGED, GUI_SELECT_DROPPED)
+        self.bind_element_listener('btn_back', self.on_back_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_next', self.on_next_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('map_select', self.on_select_changed, GUI_SELECT_CHANGED, GUI_SELECT_DROPPED)
 
     def build_gui(self):
         super().build_gui()
@@ -55,13 +51,12 @@ class SelectExistingMap(GameScene):
         self.ui_elements['btn_next'] = UIButton(button_rect, "Next", self.gui, self.ui_elements['panel'])
         self.ui_elements['btn_next'].disable()
 
-    def on_button_click(self, event):
-        if event.type == GUI_BUTTON_PRESSED:
-            if event.ui_element == self.ui_elements['btn_back']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='map_select')
-            elif event.ui_element == self.ui_elements['btn_next']:
-                if self.ui_elements['map_select'].get_single_selection() is not None:
-                    pass
+    def on_back_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='map_select')
+
+    def on_next_click(self, event):
+        if self.ui_elements['map_select'].get_single_selection() is not None:
+            pass
 
     def on_select_changed(self, event):
         if event.type == GUI_SELECT_CHANGED:
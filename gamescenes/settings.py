@@ -18,13 +18,10 @@ class Settings(GameScene):
 
     def on_enter(self):
         super().on_enter()
-        bind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-        bind_listener(self.on_drop_down_change, GUI_DROP_DOWN_CHANGED)
-
-    def on_exit(self):
-        super().on_exit()
-        unbind_listener(self.on_button_click, GUI_BUTTON_PRESSED)
-        unbind_listener(self.on_drop_down_change, GUI_DROP_DOWN_CHANGED)
+        self.bind_element_listener('btn_back', self.on_back_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('btn_apply', self.on_apply_click, GUI_BUTTON_PRESSED)
+        self.bind_element_listener('dd_d_size', self.on_drop_down_change, GUI_DROP_DOWN_CHANGED)
+        self.bind_element_listener('dd_fs', self.on_drop_down_change, GUI_DROP_DOWN_CHANGED)
 
     def build_gui(self):
         super().build_gui()
@@ -66,13 +63,12 @@ class Settings(GameScene):
         self._check_screen_size = get_param('current_display_size')
         self._check_full_screen = get_param('display_full_screen_value')
 
-    def on_button_click(self, event):
-        if event.type == GUI_BUTTON_PRESSED:
-            if event.ui_element == self.ui_elements['btn_back']:
-                post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
-            elif event.ui_element == self.ui_elements['btn_apply']:
-                self.save_settings()
-                self.game.reload_display()
+    def on_back_click(self, event):
+        post_event(EVENT_CHANGE_GAME_SCENE, to_scene='menu')
+
+    def on_apply_click(self, event):
+        self.save_settings()
+        self.game.reload_display()
 
     def on_drop_down_change(self, event):
         if event.type == GUI_DROP_DOWN_CHANGED:
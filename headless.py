@@ -0,0 +1,88 @@
+"""
+Headless runner
+
+Generates a world and runs its simulation without a display or GUI, as fast as it can.  Runs until the given number of
+ticks is reached or until interrupted with Ctrl+C, then reports how long generation took and the ticks per second.
+Useful for long simulation runs and benchmarks on machines without a display.
+
+python headless.py --seed 12345 --size 512 --ticks 100000 --script inputs.json
+
+The script is a JSON list of world inputs, see World.load_script.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from time import perf_counter
+# keep stdout to the report, the pygame banner would break --json output
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+from game.world import World, SIMULATION_RATE
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the world simulation without a display")
+    parser.add_argument('--seed', default=None, help="map seed, numeric seeds match the random map scene")
+    parser.add_argument('--size', type=int, default=256, help="map width and height in tiles")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processes used to generate the map, 0 uses every CPU, the map is the same for any count")
+    parser.add_argument('--ticks', type=int, default=0, help="number of ticks to run, 0 runs until interrupted")
+    parser.add_argument('--script', default=None, help="JSON file of inputs to queue before running")
+    parser.add_argument('--tick-rate', type=int, default=SIMULATION_RATE,
+                        help="ticks per second of game time, sets the step passed to each tick")
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                        help="seconds between progress reports, 0 turns them off")
+    parser.add_argument('--json', action='store_true', help="print the final report as JSON")
+    parser.add_argument('--log-level', default='WARNING', help="logging level, logs go to stderr")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> dict:
+    seed = args.seed
+    # the random map scene turns numeric seeds into ints, do the same so a seed gives the same map in both
+    if seed is not None and seed.isnumeric():
+        seed = int(seed)
+    gen_start = perf_counter()
+    world = World.generate(args.size, seed, workers=args.workers or None)
+    gen_time = perf_counter() - gen_start
+    queued = world.load_script(args.script) if args.script else 0
+    dt = 1.0 / args.tick_rate
+    tick = world.tick
+    start = last_report = perf_counter()
+    last_ticks = 0
+    try:
+        while not args.ticks or world.tick_count < args.ticks:
+            tick(dt)
+            # checking the clock every tick would cost more than a cheap tick, check every 1024
+            if args.report_interval and not world.tick_count & 1023:
+                now = perf_counter()
+                if now - last_report >= args.report_interval:
+                    rate = (world.tick_count - last_ticks) / (now - last_report)
+                    print(f"tick {world.tick_count}: {rate:.0f} ticks/s", file=sys.stderr)
+                    last_report, last_ticks = now, world.tick_count
+    except KeyboardInterrupt:
+        pass
+    elapsed = perf_counter() - start
+    return {
+        'size': args.size, 'seed': seed, 'workers': args.workers, 'inputs': queued, 'generation_seconds': gen_time,
+        'ticks': world.tick_count, 'game_seconds': world.game_time, 'seconds': elapsed,
+        'ticks_per_second': world.tick_count / elapsed if elapsed else 0.0
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), stream=sys.stderr,
+                        format='[%(levelname)s]:[%(module)s:%(funcName)s:%(lineno)d] %(message)s')
+    report = run(args)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"{report['size']}x{report['size']} map generated in {report['generation_seconds']:.3f}s")
+        print(f"{report['ticks']} ticks ({report['game_seconds']:.1f}s game time) in {report['seconds']:.3f}s, "
+              f"{report['ticks_per_second']:.0f} ticks/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
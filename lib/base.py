@@ -1,14 +1,30 @@
 import logging
-from pygame_gui import UIManager
+from pygame import Rect
+from pygame_gui import UI_BUTTON_PRESSED, UI_BUTTON_DOUBLE_CLICKED, UI_SELECTION_LIST_NEW_SELECTION, \
+    UI_DROP_DOWN_MENU_CHANGED, UI_SELECTION_LIST_DROPPED_SELECTION, UI_HORIZONTAL_SLIDER_MOVED, UI_TEXT_ENTRY_CHANGED
 from lib.eventbus import *
-from localpaths import GUI_THEME_FILE
+from lib.const import GUI_BUTTON_PRESSED, GUI_BUTTON_DOUBLE_PRESSED, GUI_SELECT_CHANGED, GUI_SELECT_DROPPED, \
+    GUI_DROP_DOWN_CHANGED, GUI_H_SLIDER_CHANGED, GUI_TEXT_ENTRY_CHANGED
+from lib.theme import create_ui_manager
+
+
+# push events to the event systems map for PyGameGUI events.  This lives with the scenes rather than in lib.const so
+# code that only needs the constants (the world, headless.py) doesn't have to import pygame_gui, every GUI is built by
+# a scene so the map is filled in before any GUI event can come in.
+ui_event_map[UI_BUTTON_PRESSED] = GUI_BUTTON_PRESSED
+ui_event_map[UI_BUTTON_DOUBLE_CLICKED] = GUI_BUTTON_DOUBLE_PRESSED
+ui_event_map[UI_SELECTION_LIST_NEW_SELECTION] = GUI_SELECT_CHANGED
+ui_event_map[UI_SELECTION_LIST_DROPPED_SELECTION] = GUI_SELECT_DROPPED
+ui_event_map[UI_DROP_DOWN_MENU_CHANGED] = GUI_DROP_DOWN_CHANGED
+ui_event_map[UI_HORIZONTAL_SLIDER_MOVED] = GUI_H_SLIDER_CHANGED
+ui_event_map[UI_TEXT_ENTRY_CHANGED] = GUI_TEXT_ENTRY_CHANGED
 
 
 class GameScene(object):
     """
     Base GameScene object.
 
-    Version 2.0.1
+    Version 2.4.0
 
     This version adds a lot of build in functionality accessible via super calls.  The purpose of these changes over the
     bare bones approach of 1.X is to reduce the amount of boiler plate noise when setting up a scene.
@@ -23,8 +39,35 @@ class GameScene(object):
     is to support scene reloading when settings change.
     - gui, ui_elements, and local_data removed as class properties and set as object properties.
     - added shared_data as a class variable to more easily allow things to be shared between scenes.
+
+    2.1.0
+    - added dirty rect tracking for the dirty rendering mode.  GUI elements are tracked automatically by comparing
+    their image and rect each frame, anything a scene draws outside of the GUI needs a mark_dirty call when it changes.
+    Entering the scene or rebuilding the GUI marks the whole display dirty.
+
+    2.2.0
+    - added the stale flag.  Scenes are constructed on first use and when the display changes only the active scene
+    rebuilds its GUI, the others are flagged stale and the controller rebuilds them before they're next entered.
+
+    2.2.1
+    - UIManagers are created through lib.theme so every scene shares one loaded theme.
+
+    2.3.0
+    - added bind_element_listener, binds a listener to one of the scene's GUI elements by name.  These binds are
+    removed when the scene is exited, elements are rebuilt along with the GUI so they need re-binding on enter anyway.
+
+    2.3.1
+    - bind_element_listener accepts a coalesce policy.
+
+    2.4.0
+    - added simulate and the SIMULATED flag.  A simulated scene has simulate(dt) called a fixed number of times per
+    second of game time by the controller, separately from update which still runs once per frame.  render is passed
+    the interpolation alpha, how far (0-1) game time is between the last tick and the next.
     """
 
+    # set on scenes that run a simulation, only these get simulate calls
+    SIMULATED = False
+
     # public class variable for all scenes to pass data around
     shared_data = {}
 
@@ -35,6 +78,11 @@ class GameScene(object):
         self.gui = None
         self.ui_elements = {}
         self.local_data = {}
+        self.stale = False
+        self._element_binds = []
+        self.dirty_rects = []
+        self._full_redraw = True
+        self._gui_snapshot = {}
 
     @property
     def display(self):
@@ -58,18 +106,25 @@ class GameScene(object):
     def update(self):
         self.gui.update(self.time_delta)
 
-    def render(self):
+    def simulate(self, dt: float):
+        pass
+
+    def render(self, alpha: float = 0.0):
         self.gui.draw_ui(self.display)
 
     def on_enter(self):
         logging.debug(f"Scene<{self.scene_name}> Being Entered")
         if self.gui is not None:
             set_current_ui(self.gui)
+        self.mark_dirty()
 
     def on_exit(self):
         logging.debug(f"Scene<{self.scene_name}> Being Exited")
         if self.gui is not None:
             unset_current_ui()
+        for listener, ui_element, event_types in self._element_binds:
+            unbind_element(listener, ui_element, *event_types)
+        self._element_binds.clear()
 
     def build_gui(self):
         logging.debug(f"Scene<{self.scene_name}> Is Building GUI")
@@ -77,7 +132,67 @@ class GameScene(object):
             logging.debug(f"Scene<{self.scene_name}> UIManager is present, clearing current values for rebuild")
             self.gui = None
             self.ui_elements.clear()
-            self.gui = UIManager(self.display.get_size(), GUI_THEME_FILE)
+            self.gui = create_ui_manager(self.display.get_size())
         else:
             logging.debug(f"Scene<{self.scene_name}> UIManager not present, creating new manager")
-            self.gui = UIManager(self.display.get_size(), GUI_THEME_FILE)
+            self.gui = create_ui_manager(self.display.get_size())
+        self._gui_snapshot.clear()
+        self.mark_dirty()
+
+    def bind_element_listener(self, element_name: str, listener: callable, *event_types, coalesce=None):
+        """
+        Bind a listener to events from one of the scene's GUI elements, the bind lasts until the scene is exited
+        :param element_name: str key of the element in ui_elements
+        :param listener: callable
+        :param event_types: List[int]
+        :param coalesce: Coalesce policy for the bind, see lib.eventbus
+        :return: None
+        """
+        ui_element = self.ui_elements[element_name]
+        bind_element(listener, ui_element, *event_types, coalesce=coalesce)
+        self._element_binds.append((listener, ui_element, event_types))
+
+    def mark_dirty(self, rect=None):
+        """
+        Flag an area of the display as needing to be redrawn
+        :param rect: Rect area to redraw, None redraws the whole display
+        :return: None
+        """
+        if rect is None:
+            self._full_redraw = True
+        else:
+            self.dirty_rects.append(Rect(rect))
+
+    def collect_dirty_rects(self) -> list:
+        """
+        Gather the areas of the display that changed since the last call and reset the tracking
+        :return: List[Rect], empty if nothing needs to be redrawn
+        """
+        changed = self._check_gui_changes()
+        if self._full_redraw:
+            self._full_redraw = False
+            self.dirty_rects.clear()
+            return [self.display.get_rect()]
+        rects = self.dirty_rects + changed
+        self.dirty_rects = []
+        return rects
+
+    def _check_gui_changes(self) -> list:
+        # pygame_gui elements swap in a new image whenever they change how they look, so comparing the image object
+        # and rect against the last frame finds every element that needs redrawing
+        if self.gui is None:
+            return []
+        changed = []
+        snapshot = {}
+        for sprite in self.gui.get_sprite_group().sprites():
+            state = (sprite.image, Rect(sprite.rect), getattr(sprite, 'visible', 1))
+            snapshot[sprite] = state
+            last = self._gui_snapshot.pop(sprite, None)
+            if last is None:
+                changed.append(state[1])
+            elif last[0] is not state[0] or last[1] != state[1] or last[2] != state[2]:
+                changed.append(last[1].union(state[1]))
+        # anything left over was removed since the last frame
+        changed.extend(state[1] for state in self._gui_snapshot.values())
+        self._gui_snapshot = snapshot
+        return changed
@@ -1,6 +1,4 @@
 from lib.eventbus import register_new_event, ui_event_map
-from pygame_gui import UI_BUTTON_PRESSED, UI_BUTTON_DOUBLE_CLICKED, UI_SELECTION_LIST_NEW_SELECTION, \
-    UI_DROP_DOWN_MENU_CHANGED, UI_SELECTION_LIST_DROPPED_SELECTION, UI_HORIZONTAL_SLIDER_MOVED
 
 
 # Bug work around
@@ -17,14 +15,19 @@ GUI_SELECT_CHANGED = register_new_event()
 GUI_SELECT_DROPPED = register_new_event()
 GUI_DROP_DOWN_CHANGED = register_new_event()
 GUI_H_SLIDER_CHANGED = register_new_event()
+GUI_TEXT_ENTRY_CHANGED = register_new_event()
 
-# push events to the event systems map for PyGameGUI events.
-ui_event_map[UI_BUTTON_PRESSED] = GUI_BUTTON_PRESSED
-ui_event_map[UI_BUTTON_DOUBLE_CLICKED] = GUI_BUTTON_DOUBLE_PRESSED
-ui_event_map[UI_SELECTION_LIST_NEW_SELECTION] = GUI_SELECT_CHANGED
-ui_event_map[UI_SELECTION_LIST_DROPPED_SELECTION] = GUI_SELECT_DROPPED
-ui_event_map[UI_DROP_DOWN_MENU_CHANGED] = GUI_DROP_DOWN_CHANGED
-ui_event_map[UI_HORIZONTAL_SLIDER_MOVED] = GUI_H_SLIDER_CHANGED
+# background map generation events, all of them carry the job_id of the job that posted them
+MAP_GEN_PROGRESS = register_new_event()     # progress: float 0.0 - 1.0
+MAP_GEN_COMPLETE = register_new_event()     # result: the generated map
+MAP_GEN_CANCELLED = register_new_event()
+MAP_GEN_FAILED = register_new_event()       # error: the exception raised by the job
+
+# scheduled job events, all of them carry the job_id and name of the job that posted them
+JOB_PROGRESS = register_new_event()         # progress: float 0.0 - 1.0
+JOB_COMPLETE = register_new_event()         # result: the value the job returned
+JOB_CANCELLED = register_new_event()
+JOB_FAILED = register_new_event()           # error: the exception raised by the job
 
 # tile type constants
 TILE_WATER = 0
@@ -65,6 +68,10 @@ __all__ = ['EVENT_CHANGE_GAME_SCENE',
            'ui_event_map',
            'SET_SCENE_DATA',
            'GUI_SELECT_DROPPED',
+           'GUI_H_SLIDER_CHANGED',
+           'GUI_TEXT_ENTRY_CHANGED',
+           'MAP_GEN_PROGRESS', 'MAP_GEN_COMPLETE', 'MAP_GEN_CANCELLED', 'MAP_GEN_FAILED',
+           'JOB_PROGRESS', 'JOB_COMPLETE', 'JOB_CANCELLED', 'JOB_FAILED',
            'TILE_WATER', 'TILE_HILLS', 'TILE_SHORE', 'TILE_MIDLAND', 'TILE_MOUNTAINS', 'TILE_HIGHLAND', 'TILE_LOWLAND',
            'MOVE_TYPE_LAND', 'MOVE_TYPE_NONE', 'MOVE_TYPE_WATER', 'MOVE_TYPE_MIXED',
            'ENTITY_MAN', 'ENTITY_BUSH', 'ENTITY_FIELD', 'ENTITY_HOUSE', 'ENTITY_ROAD', 'ENTITY_TREE', 'ENTITY_WOMAN',
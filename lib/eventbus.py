@@ -13,15 +13,43 @@ event with the build_event method.
 Note that this module does not keep track of new event types created and this should be handled as needed by whatever
 is creating the new event types.
 
-@version 0.0.2
+Listeners can also be bound to a single GUI element with bind_element.  Events carrying a ui_element attribute (the
+GUI_* events) are routed to the listeners bound to that element and event type with one dict lookup, so a handler
+only ever sees events from its own element and doesn't need to check which element the event came from.
+
+Any bind can take a Coalesce policy for high frequency events (mouse motion, slider moves and the like).  Events for a
+coalesced bind are collected while the queue is processed and the listener is called once at the end with the newest
+event, or with the deltas of all of them merged, and a throttled bind is called at most N times a second.  However
+fast the events come in a coalesced listener runs at most once per frame.
+
+Events posted with post_event don't go through SDL, they're held in an in-process priority queue (safe to post to from
+background threads) and drained in process_event_queue after the SDL events.  This needs no display, so the bus works
+headless for simulations and tests, and isn't limited by the size of the SDL queue.
+
+Listener calls can be instrumented with enable_instrumentation.  While it's on, call counts and total/max time are
+kept per (event type, listener) along with the queue depth of each frame, and any call that takes longer than the
+budget is logged as a warning.  The stats can be read with get_listener_stats/get_queue_depths or written out with
+dump_instrumentation.  When it's off the only cost is a check of one module variable per call.
+
+@version 0.4.0
 """
+import heapq
+import json
 import logging
+import threading
+from collections import deque
+from itertools import count as counter
+from time import perf_counter
 from pygame import USEREVENT
-from pygame.event import Event, get, post, custom_type
+from pygame.display import get_init as display_initialized
+from pygame.event import Event, get, custom_type
 
 
-__all__ = ['bind_listener', 'unbind_listener', 'clear_listeners', 'post_event', 'process_event_queue',
-           'register_new_event', 'set_current_ui', 'unset_current_ui', 'ui_event_map']
+__all__ = ['bind_listener', 'unbind_listener', 'bind_element', 'unbind_element', 'clear_listeners', 'post_event',
+           'process_event_queue', 'register_new_event', 'set_current_ui', 'unset_current_ui', 'ui_event_map',
+           'Coalesce', 'COALESCE_LATEST', 'PRIORITY_HIGH', 'PRIORITY_NORMAL', 'PRIORITY_LOW', 'pending_event_count',
+           'enable_instrumentation', 'disable_instrumentation', 'instrumentation_enabled', 'reset_instrumentation',
+           'get_listener_stats', 'get_queue_depths', 'dump_instrumentation']
 
 
 # Dict of bound listeners, EventType => List[callable, ...]
@@ -30,12 +58,119 @@ _listeners = {}
 # Dict of greedy listeners, these over-write the base listeners and effectively pause everything else from listening
 _greedy = {}
 
+# Dict of element listeners, (EventType, ui_element) => List[callable, ...]
+_element_listeners = {}
+
+# Coalesced binds that may be holding events, these are flushed at the end of process_event_queue.  A dict used as an
+# ordered set, _Coalescer => None, so they're flushed in the order they were bound
+_coalescers = {}
+
+# event priorities for post_event, lower goes first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# internal event queue, heap of (priority, sequence, Event), the sequence keeps events of the same priority in the order
+# they were posted.  Background threads post to it, so it's only touched with the lock held
+_event_queue = []
+_event_queue_lock = threading.Lock()
+_event_sequence = counter()
+
+# listener instrumentation, None while it's off
+_instrumentation = None
+
 # this is a hook for the UI manager from PyGameGUI
 _current_ui_mgr = None
 
 ui_event_map = {}
 
 
+class Coalesce(object):
+    """
+    Coalesce - version 1.0
+
+    Coalescing policy for a bind.  With no arguments only the newest event of a frame is delivered.
+
+    Attributes
+    ----------
+    merge : Tuple[str, ...]
+        event attributes that are deltas (MOUSEMOTION rel, MOUSEWHEEL x/y), these are summed over the coalesced events
+        rather than taken from the newest one
+    interval : float
+        minimum seconds between calls to the listener, 0 calls it every frame that had events
+    """
+
+    def __init__(self, merge=(), hz: float = None):
+        self.merge = tuple(merge)
+        self.interval = 1.0 / hz if hz else 0.0
+
+
+# the common case, only the newest event of a frame matters
+COALESCE_LATEST = Coalesce()
+
+
+class _Coalescer(object):
+    """
+    A coalesced bind, sits in the listener lists in place of the listener and holds events until it's flushed
+    """
+
+    __slots__ = ('listener', 'policy', 'pending', 'last_call')
+
+    def __init__(self, listener: callable, policy: Coalesce):
+        self.listener = listener
+        self.policy = policy
+        self.pending = None
+        self.last_call = 0.0
+
+    def __call__(self, event: Event) -> None:
+        if self.pending is not None and self.policy.merge:
+            event = _merge_events(self.pending, event, self.policy.merge)
+        self.pending = event
+
+    def flush(self, now: float) -> None:
+        if self.pending is None or now - self.last_call < self.policy.interval:
+            return None
+        event, self.pending = self.pending, None
+        self.last_call = now
+        _invoke(self.listener, event)
+
+
+def _merge_events(older: Event, newer: Event, fields: tuple) -> Event:
+    attrs = dict(newer.dict)
+    for field in fields:
+        if field not in attrs or field not in older.dict:
+            continue
+        if isinstance(attrs[field], tuple):
+            attrs[field] = tuple(a + b for a, b in zip(older.dict[field], attrs[field]))
+        else:
+            attrs[field] = older.dict[field] + attrs[field]
+    return Event(newer.type, attrs)
+
+
+def _make_bind(listener: callable, coalesce: Coalesce):
+    if coalesce is None:
+        return listener
+    coalescer = _Coalescer(listener, coalesce)
+    _coalescers[coalescer] = None
+    return coalescer
+
+
+def _find_bind(binds: list, listener: callable):
+    # a coalesced listener is wrapped, match on what it wraps
+    for bind in binds:
+        if bind == listener or (isinstance(bind, _Coalescer) and bind.listener == listener):
+            return bind
+    return None
+
+
+def _remove_bind(binds: list, bind) -> None:
+    binds.remove(bind)
+    if isinstance(bind, _Coalescer):
+        # anything it was holding is dropped with it
+        bind.pending = None
+        _coalescers.pop(bind, None)
+
+
 def set_current_ui(ui_manager):
     global _current_ui_mgr
     _current_ui_mgr = ui_manager
@@ -47,17 +182,19 @@ def unset_current_ui():
 
 
 # change:  Added *event_types to allow the function to accept multiple event types for a single listener
-def bind_listener(listener: callable, *event_types) -> None:
+# change: added coalesce
+def bind_listener(listener: callable, *event_types, coalesce: Coalesce = None) -> None:
     """
     Bind a listener function to event types
     :param listener: callable
     :param event_types: List[int]
+    :param coalesce: Coalesce policy, None delivers every event as it's processed
     :return: None
     """
     for event_type in event_types:
         if event_type not in _listeners.keys():
             _listeners[event_type] = []
-        _listeners[event_type].append(listener)
+        _listeners[event_type].append(_make_bind(listener, coalesce))
         logging.debug(f"Listener<{listener}> bound to event type {event_type}")
 
 
@@ -74,19 +211,21 @@ def unbind_listener(listener: callable, *event_types) -> None:
         if event_type not in _listeners.keys():
             logging.debug(f"Event type {event_type} not present in listener binds")
             return None
-        if listener not in _listeners[event_type]:
+        bind = _find_bind(_listeners[event_type], listener)
+        if bind is None:
             logging.warning(f"Listener <{listener}> not present in listener binds")
             return None
-        _listeners[event_type].remove(listener)
+        _remove_bind(_listeners[event_type], bind)
         logging.debug(f"Listener<{listener}> unbound from event type {event_type}")
 
 
 # change: added greedy binding
-def bind_greedy(listener: callable, *event_types):
+# change: added coalesce
+def bind_greedy(listener: callable, *event_types, coalesce: Coalesce = None):
     for event_type in event_types:
         if event_type not in _greedy.keys():
             _greedy[event_type] = []
-        _greedy[event_type].append(listener)
+        _greedy[event_type].append(_make_bind(listener, coalesce))
         logging.debug(f"Listener<{listener}> greedily bound to event type {event_type}")
 
 
@@ -96,36 +235,105 @@ def unbind_greedy(listener: callable, *event_types):
         if event_type not in _greedy.keys():
             logging.debug(f"Event type {event_type} not present in listener binds")
             return None
-        if listener not in _greedy[event_type]:
+        bind = _find_bind(_greedy[event_type], listener)
+        if bind is None:
             logging.warning(f"Listener <{listener}> not present in listener binds")
             return None
-        _greedy[event_type].remove(listener)
+        _remove_bind(_greedy[event_type], bind)
         # lastly, check if the greedy list for the event type is empty, if so, remove it
         if len(_greedy[event_type]) == 0:
             del _greedy[event_type]
         logging.debug(f"Listener<{listener}> greedily unbound from event type {event_type}")
 
 
+# change: added element binding
+def bind_element(listener: callable, ui_element, *event_types, coalesce: Coalesce = None) -> None:
+    """
+    Bind a listener to event types coming from a single GUI element
+    :param listener: callable
+    :param ui_element: the pygame_gui element the events have to come from
+    :param event_types: List[int]
+    :param coalesce: Coalesce policy, None delivers every event as it's processed
+    :return: None
+    """
+    for event_type in event_types:
+        key = (event_type, ui_element)
+        if key not in _element_listeners.keys():
+            _element_listeners[key] = []
+        _element_listeners[key].append(_make_bind(listener, coalesce))
+        logging.debug(f"Listener<{listener}> bound to event type {event_type} for element {ui_element}")
+
+
+# change: added element unbinding
+def unbind_element(listener: callable, ui_element, *event_types) -> None:
+    """
+    Unbind a listener from event types coming from a single GUI element
+    Note: prints warnings if a non-existent listener is passed
+    :param listener: callable
+    :param ui_element: the pygame_gui element the listener was bound to
+    :param event_types: List[int]
+    :return: None
+    """
+    for event_type in event_types:
+        key = (event_type, ui_element)
+        bind = _find_bind(_element_listeners.get(key, ()), listener)
+        if bind is None:
+            logging.warning(f"Listener <{listener}> not present in element binds for event type {event_type}")
+            continue
+        _remove_bind(_element_listeners[key], bind)
+        # drop empty lists, elements are thrown away whenever a GUI is rebuilt and we don't want to keep them alive
+        if len(_element_listeners[key]) == 0:
+            del _element_listeners[key]
+        logging.debug(f"Listener<{listener}> unbound from event type {event_type} for element {ui_element}")
+
+
 def clear_listeners() -> None:
     """
     Clears the listener binds, useful when switching out of a scene that simply needs to not respond to events anymore
     :return: None
     """
     _listeners.clear()
+    _element_listeners.clear()
+    # greedy binds survive a clear, keep their coalescers (in bind order)
+    greedy = {bind for binds in _greedy.values() for bind in binds}
+    for coalescer in [coalescer for coalescer in _coalescers if coalescer not in greedy]:
+        del _coalescers[coalescer]
     logging.debug("All listeners cleared")
 
 
-def post_event(event_type_id: int, **kwargs) -> None:
+# change: events are posted to the internal queue instead of the SDL queue
+# change: priority is keyword only, so it can't be confused with an event attribute
+def post_event(event_type_id: int, *, priority: int = PRIORITY_NORMAL, **kwargs) -> None:
     """
-    Create and post an event to the SDL event queue
+    Create and post an event to the internal event queue, it's dispatched the next time the queue is processed
     :param event_type_id: event type ID
+    :param priority: int, PRIORITY_HIGH events are dispatched before PRIORITY_NORMAL and PRIORITY_LOW ones
     :param kwargs: key,value pairs of arguments to pass to the event
     :return:
     """
-    post(Event(event_type_id, **kwargs))
+    event = Event(event_type_id, **kwargs)
+    with _event_queue_lock:
+        heapq.heappush(_event_queue, (priority, next(_event_sequence), event))
+
+
+def pending_event_count() -> int:
+    """
+    Number of events waiting in the internal queue
+    :return: int
+    """
+    return len(_event_queue)
+
+
+def _take_event_batch() -> list:
+    # everything queued right now, in priority order.  Events posted while the batch is dispatched wait for the next one
+    global _event_queue
+    with _event_queue_lock:
+        batch, _event_queue = _event_queue, []
+    batch.sort()
+    return [event for _, _, event in batch]
 
 
-def process_event_queue() -> None:
+def process_event_queue() -> int:
     """
     Processes the PyGame event queue and hands off events to any listeners registered to handle them
 
@@ -136,22 +344,185 @@ def process_event_queue() -> None:
     the 'q' key is entered.  Without a greedy block, typing "Hey quit it" would cause the scene to stop at the 'q' due
     to the other listener still processing the key input.
 
-    :return: None
+    Events with a ui_element attribute are also handed to the listeners bound to that element, unless a greedy listener
+    took the event.
+
+    Coalesced binds only collect their events while the queue is processed, once it's empty each one that's holding an
+    event (and isn't throttled) is called.
+
+    SDL events are handled first (only if there's a display), then one batch of the internal queue.  The batch includes
+    the GUI events remapped from this frame's SDL events, events posted by listeners during the batch go in the next.
+
+    :return: int, number of events processed, 0 means nothing happened this frame
     """
-    for event in get():
+    count = 0
+    sdl_events = get() if display_initialized() else ()
+    if _instrumentation is not None:
+        _instrumentation.record_queue_depth(len(sdl_events) + len(_event_queue))
+    for event in sdl_events:
+        count += 1
         # handle custom event mapping from PyGameGUI USEREVENT calls.
         if event.type == USEREVENT:
             if event.user_type in ui_event_map.keys():
-                post_event(ui_event_map[event.user_type], ui_element=event.ui_element)
-        if event.type in _greedy.keys():
-            for listener in _greedy[event.type]:
-                listener(event)
-        elif event.type in _listeners.keys():
+                post_event(ui_event_map[event.user_type], priority=PRIORITY_HIGH, ui_element=event.ui_element)
+        _dispatch(event)
+    if _event_queue:
+        for event in _take_event_batch():
+            count += 1
+            _dispatch(event)
+    if _coalescers:
+        now = perf_counter()
+        # copy, a listener may unbind.  Flushed in bind order
+        for coalescer in tuple(_coalescers):
+            coalescer.flush(now)
+    return count
+
+
+class _Instrumentation(object):
+    """
+    Listener timing and queue depth records, see enable_instrumentation
+    """
+
+    def __init__(self, budget_ms: float, history: int):
+        self.budget = budget_ms / 1000
+        # (event type, listener name) => [calls, total seconds, max seconds]
+        self.listeners = {}
+        # events waiting (SDL and internal) at the start of each frame
+        self.queue_depths = deque(maxlen=history)
+
+    def record_queue_depth(self, depth: int) -> None:
+        self.queue_depths.append(depth)
+
+    def record_call(self, event_type: int, listener: callable, elapsed: float) -> None:
+        name = _listener_name(listener)
+        stats = self.listeners.get((event_type, name))
+        if stats is None:
+            stats = self.listeners[(event_type, name)] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]:
+            stats[2] = elapsed
+        if elapsed > self.budget:
+            logging.warning(f"Listener<{name}> took {elapsed * 1000:.1f} ms handling event type {event_type}, "
+                            f"budget is {self.budget * 1000:.1f} ms")
+
+
+def _listener_name(listener: callable) -> str:
+    # a name rather than the listener itself, holding on to bound methods would keep their scenes alive
+    name = getattr(listener, '__qualname__', None)
+    if name is None:
+        return repr(listener)
+    return f"{getattr(listener, '__module__', '?')}.{name}"
+
+
+def _invoke(listener: callable, event: Event) -> None:
+    # a coalesced bind only stores the event here, its listener is timed when it's flushed
+    if _instrumentation is None or isinstance(listener, _Coalescer):
+        listener(event)
+        return None
+    start = perf_counter()
+    listener(event)
+    _instrumentation.record_call(event.type, listener, perf_counter() - start)
+
+
+def enable_instrumentation(budget_ms: float = 8.0, history: int = 600) -> None:
+    """
+    Start recording listener call times and queue depths, stats already recorded are kept
+    :param budget_ms: float, listener calls taking longer than this are logged as warnings
+    :param history: int, number of frames of queue depth to keep
+    :return: None
+    """
+    global _instrumentation
+    if _instrumentation is None:
+        _instrumentation = _Instrumentation(budget_ms, history)
+    else:
+        _instrumentation.budget = budget_ms / 1000
+    logging.debug(f"Event instrumentation enabled, listener budget {budget_ms} ms")
+
+
+def disable_instrumentation() -> None:
+    """
+    Stop recording and throw away the recorded stats
+    :return: None
+    """
+    global _instrumentation
+    _instrumentation = None
+    logging.debug("Event instrumentation disabled")
+
+
+def instrumentation_enabled() -> bool:
+    return _instrumentation is not None
+
+
+def reset_instrumentation() -> None:
+    """
+    Clear the recorded stats without turning instrumentation off
+    :return: None
+    """
+    if _instrumentation is not None:
+        _instrumentation.listeners.clear()
+        _instrumentation.queue_depths.clear()
+
+
+def get_listener_stats() -> list:
+    """
+    Recorded listener stats, slowest total first
+    :return: List[dict] with event_type, listener, calls, total_ms, mean_ms and max_ms keys, empty when instrumentation
+    is off
+    """
+    if _instrumentation is None:
+        return []
+    stats = [
+        {
+            'event_type': event_type, 'listener': name, 'calls': calls, 'total_ms': total * 1000,
+            'mean_ms': total * 1000 / calls, 'max_ms': longest * 1000
+        } for (event_type, name), (calls, total, longest) in _instrumentation.listeners.items()
+    ]
+    stats.sort(key=lambda entry: entry['total_ms'], reverse=True)
+    return stats
+
+
+def get_queue_depths() -> list:
+    """
+    Number of events waiting (SDL and internal) at the start of each recorded frame, oldest first
+    :return: List[int]
+    """
+    if _instrumentation is None:
+        return []
+    return list(_instrumentation.queue_depths)
+
+
+def dump_instrumentation(file_path: str) -> None:
+    """
+    Write the recorded stats to a JSON file
+    :param file_path: str
+    :return: None
+    """
+    with open(file_path, 'w') as handle:
+        json.dump({
+            'budget_ms': _instrumentation.budget * 1000 if _instrumentation is not None else None,
+            'listeners': get_listener_stats(),
+            'queue_depths': get_queue_depths()
+        }, handle)
+    logging.info(f"Event instrumentation written to {file_path}")
+
+
+def _dispatch(event: Event) -> None:
+    if event.type in _greedy.keys():
+        for listener in _greedy[event.type]:
+            _invoke(listener, event)
+    else:
+        if event.type in _listeners.keys():
             for listener in _listeners[event.type]:
-                listener(event)
-        # propagate to the UI manager if it's set
-        if _current_ui_mgr is not None:
-            _current_ui_mgr.process_events(event)
+                _invoke(listener, event)
+        ui_element = getattr(event, 'ui_element', None)
+        if ui_element is not None:
+            # copy, a listener changing scenes unbinds elements while we're still going
+            for listener in tuple(_element_listeners.get((event.type, ui_element), ())):
+                _invoke(listener, event)
+    # propagate to the UI manager if it's set
+    if _current_ui_mgr is not None:
+        _current_ui_mgr.process_events(event)
 
 
 def register_new_event() -> int:
@@ -5,8 +5,21 @@ Contains functions for building game maps.
 """
 import logging
 import random
-import noise
-from lib.structure import Grid
+from lib.noisefield import pnoise2_array, noise_grid
+from lib.structure import Grid, ArrayGrid, HEIGHT_DTYPE
+from lib.terrain import as_array, classify_heights
+
+
+# bump this whenever a change to the generation code changes the maps it produces, cached maps from other versions are
+# thrown away
+GENERATOR_VERSION = 1
+
+# upper limit of each tile type's height range, anything above the last value is a mountain
+HEIGHT_THRESHOLDS = (0.48, 0.49, 0.5, 0.53, 0.56, 0.58)
+
+# noise parameters used by generate_noise_grid, the scale is applied to the X/Y values before they're passed in
+NOISE_SCALE = 0.2
+NOISE_PARAMS = {'octaves': 8, 'persistence': 1.0, 'lacunarity': 0.5, 'repeatx': 1024, 'repeaty': 1024, 'base': 1}
 
 
 def map_height_value(value: float) -> int:
@@ -46,6 +59,8 @@ def get_noise(x: float, y: float, octs=8, per=1.0, lac=0.5, repeat_x=1024, repea
     :param repeat_y: repeat on Y axis
     :return: float
     """
+    # imported here, the noise module is only needed for this per cell reference version
+    import noise
     return noise.pnoise2(x, y, octaves=octs, persistence=per, lacunarity=lac, repeatx=repeat_x, repeaty=repeat_y, base=1)
 
 
@@ -54,14 +69,14 @@ def scale_noise(noise_value: float) -> float:
     Scale noise values to be between 0.0 and 1.0
 
     The default return from Perlin noise is -1.0 to 1.0, this function is designed to take that value, shift it by 1.0
-    and then divide it by 2 to give us a value between 0.0 and 1.0
-    :param noise_value: float
-    :return: float
+    and then divide it by 2 to give us a value between 0.0 and 1.0.  Also works on NumPy arrays of noise values.
+    :param noise_value: float|np.ndarray
+    :return: float|np.ndarray
     """
     return (noise_value + 1.0) * 0.5
 
 
-def generate_noise_grid(width: int, height: int, seed=None) -> Grid:
+def generate_noise_grid(width: int, height: int, seed=None, workers=1, progress=None) -> ArrayGrid:
     """
     Generates a Grid that contains a noise map generated either using a random seed or a given seed.  The seed controls
     the offset that is applied to the X/Y axis and the noise is scaled to be between 0.0 and 1.0 prior to being added
@@ -70,7 +85,9 @@ def generate_noise_grid(width: int, height: int, seed=None) -> Grid:
     :param width: int, width of the map
     :param height: int, height of the map
     :param seed: Any, a seed used for the randomization
-    :return: Grid
+    :param workers: int, worker processes used to generate the map in tiles, 1 generates in process, None uses all CPUs
+    :param progress: optional callable, called with the fraction of the map generated as generation goes
+    :return: ArrayGrid, HEIGHT_DTYPE values
     """
     # setup seed for RNG
     rng = random.Random()
@@ -81,24 +98,24 @@ def generate_noise_grid(width: int, height: int, seed=None) -> Grid:
     map_seed = rng.randint(-1024, 1024)
     # log some stuff here
     logging.debug(f"Generating {width}x{height} map with seed {map_seed}")
-    # build the grid to hold the values
-    n_grid = Grid(width, height)
-    # let's begin filling the grid
-    # we'll go ahead and scale the noise as we generate it too so we return a grid with values 0.0 - 1.0
-    for y in range(height):
-        for x in range(width):
-            n_x = (x + map_seed) * 0.2
-            n_y = (y + map_seed) * 0.2
-            n_grid[(x, y)] = scale_noise(get_noise(n_x, n_y))
+    # generate the whole noise field in one batch, these are the same parameters get_noise uses, and scale it so we
+    # return a grid with values 0.0 - 1.0
+    n_values = noise_grid(pnoise2_array, width, height, map_seed, map_seed, NOISE_SCALE, workers=workers,
+                          progress=progress, **NOISE_PARAMS)
+    n_grid = ArrayGrid.from_array(scale_noise(n_values).astype(HEIGHT_DTYPE, copy=False))
     logging.debug(f"Map generated")
     return n_grid
 
 
-def generate_height_grid(grid: Grid):
+def generate_height_grid(grid: Grid, thresholds=HEIGHT_THRESHOLDS) -> ArrayGrid:
+    """
+    Classifies a noise grid into tile ids, this gives the same result as calling map_height_value on every cell but
+    does it in one pass over the whole grid.
+    :param grid: Grid of noise values 0.0 - 1.0
+    :param thresholds: ascending upper limit for each tile type, defaults to HEIGHT_THRESHOLDS
+    :return: ArrayGrid
+    """
     logging.debug("Generating height grid from existing noise grid")
-    height_grid = Grid(grid.width, grid.height)
-    for y in range(grid.width):
-        for x in range(grid.height):
-            height_grid[(x, y)] = map_height_value(grid[(x, y)])
+    height_grid = ArrayGrid.from_array(classify_heights(as_array(grid), thresholds))
     logging.debug("Height grid generated")
     return height_grid
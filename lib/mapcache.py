@@ -0,0 +1,176 @@
+"""
+Map cache module
+
+Two level cache for generated map data (noise fields, height maps, anything that's a NumPy array).  The first level is
+an in memory LRU with a byte budget, the second level is a directory of .npy files on disk so maps survive a restart.
+The disk tier has a byte budget too, the least recently used files are deleted once it's over.  Only data that's
+expensive to make is worth a disk write, put can keep cheap data (height maps rebuilt from a cached noise field) in
+memory only.
+
+Keys are built from the parameters that produced the data plus the generator version, the disk tier is kept in a
+directory per version and directories from other versions are removed, so changing the generation code (and bumping
+GENERATOR_VERSION) invalidates everything that was cached before.
+
+The cache is shared between the game loop and the background generation worker, so access is locked.  Cached arrays
+are handed to every caller of get, so they're marked read only, copy one before changing it.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Union
+from localpaths import CACHE_DIR
+from lib.mapbuilder import GENERATOR_VERSION
+
+
+__all__ = ['MapCache', 'make_key']
+
+
+def make_key(kind: str, **params) -> str:
+    """
+    Build a cache key from the kind of data and the parameters that produced it
+    :param kind: str, e.g. 'noise' or 'height'
+    :param params: anything JSON serializable (tuples become lists, anything else falls back to str)
+    :return: str
+    """
+    raw = json.dumps({'kind': kind, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class MapCache(object):
+    """
+    MapCache - version 1.2
+
+    Attributes
+    ----------
+    memory_budget : int
+        maximum bytes held in the memory tier
+    disk_budget : int
+        maximum bytes held in the disk tier
+    cache_dir : Union[None, str]
+        directory for the disk tier, None disables it
+
+    Methods
+    -------
+    get(str) : Union[None, np.ndarray]
+        returns the (read only) array for a key, checking memory first then disk, None on a miss
+    put(str, np.ndarray, bool) : None
+        stores an array in memory, and on disk unless asked not to, the array is made read only
+    clear(bool) : None
+        empties the memory tier, and the disk tier if asked
+    """
+
+    def __init__(self, memory_budget=64 * 1024 * 1024, disk_budget=256 * 1024 * 1024, cache_dir=CACHE_DIR,
+                 version=GENERATOR_VERSION):
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.cache_dir = None
+        if cache_dir is not None:
+            self.cache_dir = os.path.join(cache_dir, f"v{version}")
+        self._root_dir = cache_dir
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._purged = False
+
+    @property
+    def memory_used(self) -> int:
+        return self._memory_used
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key: str) -> Union[None, np.ndarray]:
+        with self._lock:
+            array = self._memory.get(key)
+            if array is not None:
+                self._memory.move_to_end(key)
+                return array
+        if self.cache_dir is None or not os.path.isfile(self._path(key)):
+            return None
+        try:
+            array = np.load(self._path(key))
+        except (OSError, ValueError):
+            logging.warning(f"Map cache entry {key} could not be read, discarding it")
+            os.remove(self._path(key))
+            return None
+        array.flags.writeable = False
+        # the disk tier evicts by modified time, mark this entry as recently used
+        os.utime(self._path(key))
+        with self._lock:
+            self._remember(key, array)
+        return array
+
+    def put(self, key: str, array: np.ndarray, disk=True) -> None:
+        """
+        Store an array.  The disk write happens on the calling thread, large arrays should be put from a worker.  The
+        array isn't copied, it's marked read only so nothing sharing it can change what's cached.
+        :param key: str
+        :param array: np.ndarray, made read only
+        :param disk: bool, False keeps the array in the memory tier only
+        :return: None
+        """
+        array.flags.writeable = False
+        with self._lock:
+            self._remember(key, array)
+        if not disk or self.cache_dir is None:
+            return None
+        self._purge_other_versions()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write to a temp file first so a crash never leaves a half written entry behind
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'wb') as handle:
+            np.save(handle, array)
+        os.replace(tmp_path, self._path(key))
+        self._enforce_disk_budget()
+
+    def clear(self, disk=False) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        if disk and self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _remember(self, key: str, array: np.ndarray):
+        # caller holds the lock
+        if key in self._memory:
+            self._memory_used -= self._memory.pop(key).nbytes
+        self._memory[key] = array
+        self._memory_used += array.nbytes
+        while self._memory_used > self.memory_budget and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= evicted.nbytes
+
+    def _enforce_disk_budget(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npy'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        used = sum(size for _, size, _ in entries)
+        # oldest first, the newest entry is always kept
+        for _, size, name in sorted(entries)[:-1]:
+            if used <= self.disk_budget:
+                break
+            logging.debug(f"Map cache over its disk budget, removing {name}")
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            used -= size
+
+    def _purge_other_versions(self):
+        if self._purged:
+            return None
+        self._purged = True
+        if not os.path.isdir(self._root_dir):
+            return None
+        for entry in os.listdir(self._root_dir):
+            path = os.path.join(self._root_dir, entry)
+            if os.path.isdir(path) and path != self.cache_dir:
+                logging.debug(f"Removing stale map cache {path}")
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,392 @@
+"""
+Noise Field Module
+
+Batched versions of the Perlin and simplex noise functions from the noise module (https://github.com/caseman/noise).
+
+The noise module only evaluates a single point per call, which means building a map calls it once per cell from a
+nested Python loop.  The functions here are direct NumPy ports of the C implementations (same permutation and gradient
+tables, same float32 arithmetic) that evaluate whole coordinate arrays at once.  Results match noise.pnoise2 and
+noise.snoise2 to within float32 rounding, so a given seed still produces the same map.
+"""
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+__all__ = ['pnoise2_array', 'snoise2_array', 'noise_grid']
+
+
+# limits how many cells are evaluated at once by noise_grid, the simplex functions create a lot of temporary arrays
+# and this keeps them small enough to stay in cache without a large map blowing up memory use
+_BAND_CELLS = 1 << 16
+
+_f = np.float32
+
+_PERM = np.array([
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225, 140, 36, 103, 30, 69, 142, 8, 99, 37,
+    240, 21, 10, 23, 190, 6, 148, 247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32, 57, 177,
+    33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175, 74, 165, 71, 134, 139, 48, 27, 166, 77, 146,
+    158, 231, 83, 111, 229, 122, 60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54, 65, 25,
+    63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169, 200, 196, 135, 130, 116, 188, 159, 86, 164, 100,
+    109, 198, 173, 186, 3, 64, 52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212, 207, 206,
+    59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213, 119, 248, 152, 2, 44, 154, 163, 70, 221, 153,
+    101, 155, 167, 43, 172, 9, 129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104, 218, 246,
+    97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241, 81, 51, 145, 235, 249, 14, 239, 107, 49, 192,
+    214, 31, 181, 199, 106, 157, 184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93, 222, 114,
+    67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180
+] * 2, dtype=np.int32)
+
+_GRAD3 = np.array([
+    (1, 1, 0), (-1, 1, 0), (1, -1, 0), (-1, -1, 0), (1, 0, 1), (-1, 0, 1), (1, 0, -1), (-1, 0, -1), (0, 1, 1),
+    (0, -1, 1), (0, 1, -1), (0, -1, -1), (1, 0, -1), (-1, 0, -1), (0, -1, 1), (0, 1, 1)
+], dtype=np.float32)
+
+_GRAD4 = np.array([
+    (0, 1, 1, 1), (0, 1, 1, -1), (0, 1, -1, 1), (0, 1, -1, -1), (0, -1, 1, 1), (0, -1, 1, -1), (0, -1, -1, 1),
+    (0, -1, -1, -1), (1, 0, 1, 1), (1, 0, 1, -1), (1, 0, -1, 1), (1, 0, -1, -1), (-1, 0, 1, 1), (-1, 0, 1, -1),
+    (-1, 0, -1, 1), (-1, 0, -1, -1), (1, 1, 0, 1), (1, 1, 0, -1), (1, -1, 0, 1), (1, -1, 0, -1), (-1, 1, 0, 1),
+    (-1, 1, 0, -1), (-1, -1, 0, 1), (-1, -1, 0, -1), (1, 1, 1, 0), (1, 1, -1, 0), (1, -1, 1, 0), (1, -1, -1, 0),
+    (-1, 1, 1, 0), (-1, 1, -1, 0), (-1, -1, 1, 0), (-1, -1, -1, 0)
+], dtype=np.float32)
+
+_SIMPLEX = np.array([
+    (0,1,2,3), (0,1,3,2), (0,0,0,0), (0,2,3,1), (0,0,0,0), (0,0,0,0), (0,0,0,0), (1,2,3,0), (0,2,1,3), (0,0,0,0),
+    (0,3,1,2), (0,3,2,1), (0,0,0,0), (0,0,0,0), (0,0,0,0), (1,3,2,0), (0,0,0,0), (0,0,0,0), (0,0,0,0), (0,0,0,0),
+    (0,0,0,0), (0,0,0,0), (0,0,0,0), (0,0,0,0), (1,2,0,3), (0,0,0,0), (1,3,0,2), (0,0,0,0), (0,0,0,0), (0,0,0,0),
+    (2,3,0,1), (2,3,1,0), (1,0,2,3), (1,0,3,2), (0,0,0,0), (0,0,0,0), (0,0,0,0), (2,0,3,1), (0,0,0,0), (2,1,3,0),
+    (0,0,0,0), (0,0,0,0), (0,0,0,0), (0,0,0,0), (0,0,0,0), (0,0,0,0), (0,0,0,0), (0,0,0,0), (2,0,1,3), (0,0,0,0),
+    (0,0,0,0), (0,0,0,0), (3,0,1,2), (3,0,2,1), (0,0,0,0), (3,1,2,0), (2,1,0,3), (0,0,0,0), (0,0,0,0), (0,0,0,0),
+    (3,1,0,2), (0,0,0,0), (3,2,0,1), (3,2,1,0)
+], dtype=np.int32)
+
+# corner offsets for the 3D simplex, indexed by the branch taken in the C version's if/else tree
+_SIMPLEX3_O1 = np.array([(1, 0, 0), (1, 0, 0), (0, 0, 1), (0, 0, 1), (0, 1, 0), (0, 1, 0)], dtype=np.int32)
+_SIMPLEX3_O2 = np.array([(1, 1, 0), (1, 0, 1), (1, 0, 1), (0, 1, 1), (0, 1, 1), (1, 1, 0)], dtype=np.int32)
+
+# simplex skew factors, these are float constants in the C source
+_F2 = _f(0.3660254037844386)
+_G2 = _f(0.21132486540518713)
+_F3 = _f(1.0) / _f(3.0)
+_G3 = _f(1.0) / _f(6.0)
+_F4 = _f(0.30901699437494745)
+_G4 = _f(0.1381966011250105)
+
+
+def _fade(t: np.ndarray) -> np.ndarray:
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _lerp(t: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return a + t * (b - a)
+
+
+def _grad2(h: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    h = h & 15
+    return x * _GRAD3[h, 0] + y * _GRAD3[h, 1]
+
+
+def _perlin2(x: np.ndarray, y: np.ndarray, repeat_x: np.float32, repeat_y: np.float32, base: int) -> np.ndarray:
+    i = np.floor(np.fmod(x, repeat_x)).astype(np.int32)
+    j = np.floor(np.fmod(y, repeat_y)).astype(np.int32)
+    ii = np.fmod((i + 1).astype(np.float32), repeat_x).astype(np.int32)
+    jj = np.fmod((j + 1).astype(np.float32), repeat_y).astype(np.int32)
+    i = (i & 255) + base
+    j = (j & 255) + base
+    ii = (ii & 255) + base
+    jj = (jj & 255) + base
+
+    x = x - np.floor(x)
+    y = y - np.floor(y)
+    fx = _fade(x)
+    fy = _fade(y)
+
+    a = _PERM[i]
+    aa = _PERM[a + j]
+    ab = _PERM[a + jj]
+    b = _PERM[ii]
+    ba = _PERM[b + j]
+    bb = _PERM[b + jj]
+
+    return _lerp(fy, _lerp(fx, _grad2(_PERM[aa], x, y), _grad2(_PERM[ba], x - 1, y)),
+                 _lerp(fx, _grad2(_PERM[ab], x, y - 1), _grad2(_PERM[bb], x - 1, y - 1)))
+
+
+def _simplex2(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    s = (x + y) * _F2
+    i = np.floor(x + s)
+    j = np.floor(y + s)
+    t = (i + j) * _G2
+
+    x0 = x - (i - t)
+    y0 = y - (j - t)
+    i1 = (x0 > y0).astype(np.int32)
+    j1 = (x0 <= y0).astype(np.int32)
+
+    x1 = x0 - i1 + _G2
+    y1 = y0 - j1 + _G2
+    x2 = x0 + _G2 * 2 - 1
+    y2 = y0 + _G2 * 2 - 1
+
+    i_i = i.astype(np.int32) & 255
+    j_i = j.astype(np.int32) & 255
+    g0 = _PERM[i_i + _PERM[j_i]] % 12
+    g1 = _PERM[i_i + i1 + _PERM[j_i + j1]] % 12
+    g2 = _PERM[i_i + 1 + _PERM[j_i + 1]] % 12
+
+    total = np.zeros_like(x)
+    for g, xc, yc in ((g0, x0, y0), (g1, x1, y1), (g2, x2, y2)):
+        f = _f(0.5) - xc * xc - yc * yc
+        n = f * f * f * f * (_GRAD3[g, 0] * xc + _GRAD3[g, 1] * yc)
+        total = total + np.where(f > 0, n, _f(0.0))
+    return total * _f(70.0)
+
+
+def _simplex3(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+    s = (x + y + z) * _F3
+    i = np.floor(x + s)
+    j = np.floor(y + s)
+    k = np.floor(z + s)
+    t = (i + j + k) * _G3
+
+    x0 = x - (i - t)
+    y0 = y - (j - t)
+    z0 = z - (k - t)
+
+    # the C version picks the simplex corners with an if/else tree, each branch of the tree is one row in the
+    # _SIMPLEX3_O1/_SIMPLEX3_O2 tables
+    x_ge_y = x0 >= y0
+    branch = np.select([x_ge_y & (y0 >= z0),
+                        x_ge_y & (x0 >= z0),
+                        x_ge_y,
+                        y0 < z0,
+                        x0 < z0], [0, 1, 2, 3, 4], 5)
+    # move the corner axis to the front, .T would also swap the grid axes of 2D input
+    o1 = np.moveaxis(_SIMPLEX3_O1[branch], -1, 0)
+    o2 = np.moveaxis(_SIMPLEX3_O2[branch], -1, 0)
+
+    pos = [(x0, y0, z0),
+           (x0 - o1[0] + _G3, y0 - o1[1] + _G3, z0 - o1[2] + _G3),
+           (x0 - o2[0] + _G3 * 2, y0 - o2[1] + _G3 * 2, z0 - o2[2] + _G3 * 2),
+           (x0 - 1 + _G3 * 3, y0 - 1 + _G3 * 3, z0 - 1 + _G3 * 3)]
+
+    i_i = i.astype(np.int32) & 255
+    j_i = j.astype(np.int32) & 255
+    k_i = k.astype(np.int32) & 255
+    g = [_PERM[i_i + _PERM[j_i + _PERM[k_i]]] % 12,
+         _PERM[i_i + o1[0] + _PERM[j_i + o1[1] + _PERM[o1[2] + k_i]]] % 12,
+         _PERM[i_i + o2[0] + _PERM[j_i + o2[1] + _PERM[o2[2] + k_i]]] % 12,
+         _PERM[i_i + 1 + _PERM[j_i + 1 + _PERM[k_i + 1]]] % 12]
+
+    total = np.zeros_like(x)
+    for (xc, yc, zc), gc in zip(pos, g):
+        f = _f(0.6) - xc * xc - yc * yc - zc * zc
+        n = f * f * f * f * (xc * _GRAD3[gc, 0] + yc * _GRAD3[gc, 1] + zc * _GRAD3[gc, 2])
+        total = total + np.where(f > 0, n, _f(0.0))
+    return total * _f(32.0)
+
+
+def _simplex4(x: np.ndarray, y: np.ndarray, z: np.ndarray, w: np.ndarray) -> np.ndarray:
+    s = (x + y + z + w) * _F4
+    i = np.floor(x + s)
+    j = np.floor(y + s)
+    k = np.floor(z + s)
+    m = np.floor(w + s)
+    t = (i + j + k + m) * _G4
+
+    x0 = x - (i - t)
+    y0 = y - (j - t)
+    z0 = z - (k - t)
+    w0 = w - (m - t)
+
+    c = ((x0 > y0) * 32 + (x0 > z0) * 16 + (y0 > z0) * 8 + (x0 > w0) * 4 + (y0 > w0) * 2 + (z0 > w0)).astype(np.int32)
+    simplex = _SIMPLEX[c]
+
+    i_i = i.astype(np.int32) & 255
+    j_i = j.astype(np.int32) & 255
+    k_i = k.astype(np.int32) & 255
+    m_i = m.astype(np.int32) & 255
+
+    total = np.zeros_like(x)
+    for corner in range(5):
+        if corner == 0:
+            offset = (0, 0, 0, 0)
+        elif corner == 4:
+            offset = (1, 1, 1, 1)
+        else:
+            offset = [(simplex[..., axis] >= 4 - corner).astype(np.int32) for axis in range(4)]
+        # corner 4 is written as x0 - 1.0f + 4.0f*G4 in C, the others as x0 - offset + n*G4, same value either way
+        skew = _G4 * corner
+        xc = x0 - offset[0] + skew
+        yc = y0 - offset[1] + skew
+        zc = z0 - offset[2] + skew
+        wc = w0 - offset[3] + skew
+        gi = _PERM[i_i + offset[0] + _PERM[j_i + offset[1] + _PERM[k_i + offset[2] + _PERM[m_i + offset[3]]]]] & 0x1f
+        f = _f(0.6) - xc * xc - yc * yc - zc * zc - wc * wc
+        hit = f >= 0
+        f = f * f
+        n = f * f * (_GRAD4[gi, 0] * xc + _GRAD4[gi, 1] * yc + _GRAD4[gi, 2] * zc + _GRAD4[gi, 3] * wc)
+        total = total + np.where(hit, n, _f(0.0))
+    return total * _f(27.0)
+
+
+def _fast_sin(x: np.ndarray) -> np.ndarray:
+    # fast sine approximation used by the tiled simplex noise, input is in half turns rather than radians
+    z = x + _f(25165824.0)
+    x = x - (z - _f(25165824.0))
+    y = x - x * np.abs(x)
+    return y * (_f(3.1) + _f(3.6) * np.abs(y))
+
+
+def _fast_cos(x: np.ndarray) -> np.ndarray:
+    return _fast_sin(x + _f(0.5))
+
+
+def _fbm(noise_func, coords: tuple, octaves: int, persistence: float, lacunarity: float) -> np.ndarray:
+    # fractal sum used by the simplex functions, the first octave is always evaluated at frequency 1
+    freq, amp, max_amp = _f(1.0), _f(1.0), _f(1.0)
+    total = noise_func(*coords)
+    for _ in range(1, octaves):
+        freq *= _f(lacunarity)
+        amp *= _f(persistence)
+        max_amp += amp
+        total = total + noise_func(*[c * freq for c in coords]) * amp
+    return total / max_amp
+
+
+def pnoise2_array(x, y, octaves=1, persistence=0.5, lacunarity=2.0, repeatx=1024, repeaty=1024,
+                  base=0) -> np.ndarray:
+    """
+    Array version of noise.pnoise2, takes arrays (or anything broadcastable) of X and Y coordinates and returns a
+    float32 array of Perlin noise values between -1.0 and 1.0
+    :param x: array of X coordinates
+    :param y: array of Y coordinates
+    :param octaves: int
+    :param persistence: float
+    :param lacunarity: float
+    :param repeatx: repeat on X axis
+    :param repeaty: repeat on Y axis
+    :param base: int, offset into the permutation table
+    :return: np.ndarray
+    """
+    if octaves <= 0:
+        raise ValueError("Expected octaves value > 0")
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float32), np.asarray(y, dtype=np.float32))
+    freq, amp, max_amp = _f(1.0), _f(1.0), _f(0.0)
+    total = np.zeros(x.shape, dtype=np.float32)
+    for _ in range(octaves):
+        total = total + _perlin2(x * freq, y * freq, _f(repeatx) * freq, _f(repeaty) * freq, base) * amp
+        max_amp += amp
+        freq *= _f(lacunarity)
+        amp *= _f(persistence)
+    return total / max_amp
+
+
+def snoise2_array(x, y, octaves=1, persistence=0.5, lacunarity=2.0, repeatx=None, repeaty=None,
+                  base=0.0) -> np.ndarray:
+    """
+    Array version of noise.snoise2, takes arrays (or anything broadcastable) of X and Y coordinates and returns a
+    float32 array of simplex noise values between -1.0 and 1.0
+
+    As with noise.snoise2, tiling is done by wrapping the coordinates around a torus, so a repeating axis switches the
+    evaluation to 3D (one axis) or 4D (both axes) simplex noise.
+    :param x: array of X coordinates
+    :param y: array of Y coordinates
+    :param octaves: int
+    :param persistence: float
+    :param lacunarity: float
+    :param repeatx: None for no tiling on the X axis, otherwise the repeat size
+    :param repeaty: None for no tiling on the Y axis, otherwise the repeat size
+    :param base: float, offset applied to the noise coordinates
+    :return: np.ndarray
+    """
+    if octaves <= 0:
+        raise ValueError("Expected octaves value > 0")
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float32), np.asarray(y, dtype=np.float32))
+    z = _f(base)
+    if repeatx is None and repeaty is None:
+        # flat noise, the base is added after the frequency is applied so it can't go through _fbm
+        freq, amp, max_amp = _f(1.0), _f(1.0), _f(1.0)
+        total = _simplex2(x + z, y + z)
+        for _ in range(1, octaves):
+            freq *= _f(lacunarity)
+            amp *= _f(persistence)
+            max_amp += amp
+            total = total + _simplex2(x * freq + z, y * freq + z) * amp
+        return total / max_amp
+    # tiled noise, the C version does this part in double precision before storing back to float
+    w = np.full(x.shape, z, dtype=np.float32)
+    z = np.full(x.shape, z, dtype=np.float32)
+    if repeaty is not None:
+        y_f = (y.astype(np.float64) * 2.0 / _f(repeaty)).astype(np.float32)
+        y_r = _f(_f(repeaty) * (1.0 / np.pi) * 0.5)
+        w = w + _fast_cos(y_f) * y_r
+        y = _fast_sin(y_f) * y_r
+        if repeatx is None:
+            return _fbm(_simplex3, (x, y, w), octaves, persistence, lacunarity)
+    x_f = (x.astype(np.float64) * 2.0 / _f(repeatx)).astype(np.float32)
+    x_r = _f(_f(repeatx) * (1.0 / np.pi) * 0.5)
+    z = z + _fast_cos(x_f) * x_r
+    x = _fast_sin(x_f) * x_r
+    if repeaty is None:
+        return _fbm(_simplex3, (x, y, z), octaves, persistence, lacunarity)
+    return _fbm(_simplex4, (x, y, z, w), octaves, persistence, lacunarity)
+
+
+def _noise_tile(noise_func, tile_x: int, tile_y: int, width: int, height: int, offset_x, offset_y, scale,
+                kwargs: dict) -> tuple:
+    # worker side of the parallel path, a tile is just a smaller grid shifted by the tile origin
+    return tile_x, tile_y, noise_grid(noise_func, width, height, offset_x + tile_x, offset_y + tile_y, scale, **kwargs)
+
+
+def noise_grid(noise_func, width: int, height: int, offset_x=0, offset_y=0, scale=1.0, workers=1, tile_size=256,
+               progress=None, **kwargs) -> np.ndarray:
+    """
+    Evaluates a batched noise function over a width x height block of cells.  Cell (x, y) samples the noise at
+    ((x + offset_x) * scale, (y + offset_y) * scale), which is the same coordinate mapping the per-cell map builders
+    use.  The block is evaluated in bands of rows to keep the temporary arrays small.
+
+    With workers > 1 the block is split into tile_size x tile_size tiles that are generated in a process pool and
+    stitched back together.  Every cell only depends on its own coordinate and the offsets, which are fixed before any
+    work is handed out, so tiles line up seamlessly and the result is byte for byte the same for any worker count.
+    :param noise_func: pnoise2_array or snoise2_array
+    :param width: int
+    :param height: int
+    :param offset_x: X offset applied before scaling
+    :param offset_y: Y offset applied before scaling
+    :param scale: float
+    :param workers: int, number of worker processes, 1 generates in process and None uses every CPU
+    :param tile_size: int, size of the tiles handed to the workers
+    :param progress: optional callable, called with the fraction of the grid completed after each band or tile
+    :param kwargs: noise parameters passed to noise_func
+    :return: np.ndarray, float32 values shaped (height, width)
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and (width > tile_size or height > tile_size):
+        out = np.empty((height, width), dtype=np.float32)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(_noise_tile, noise_func, t_x, t_y, min(tile_size, width - t_x),
+                                min(tile_size, height - t_y), offset_x, offset_y, scale, kwargs)
+                    for t_y in range(0, height, tile_size) for t_x in range(0, width, tile_size)]
+            try:
+                for done, job in enumerate(as_completed(jobs), 1):
+                    t_x, t_y, tile = job.result()
+                    out[t_y:t_y + tile.shape[0], t_x:t_x + tile.shape[1]] = tile
+                    if progress is not None:
+                        progress(done / len(jobs))
+            except BaseException:
+                # don't start any tiles that are still queued, the pool still waits for the running ones on exit
+                for job in jobs:
+                    job.cancel()
+                raise
+        return out
+    # coordinates are built in double precision then converted, matching the float conversion done by the noise module
+    n_x = ((np.arange(width, dtype=np.float64) + offset_x) * scale).astype(np.float32)
+    n_y = ((np.arange(height, dtype=np.float64) + offset_y) * scale).astype(np.float32)
+    out = np.empty((height, width), dtype=np.float32)
+    band = max(1, _BAND_CELLS // max(1, width))
+    for y in range(0, height, band):
+        out[y:y + band] = noise_func(n_x[np.newaxis, :], n_y[y:y + band, np.newaxis], **kwargs)
+        if progress is not None:
+            progress(min(y + band, height) / height)
+    return out
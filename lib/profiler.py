@@ -0,0 +1,217 @@
+"""
+Frame profiler module
+
+Records how long each phase of a frame takes (event processing, scene update, simulation ticks, scheduled jobs, scene
+render, clock tick and the display flip) into a fixed size ring buffer along with the scene that was active.  Recording
+is a handful of perf_counter calls and one row write per frame, the percentile overlay is only built while it's shown.
+
+The buffer can be dumped to CSV or JSON for a closer look outside of the game.
+"""
+import csv
+import json
+import logging
+import os
+import numpy as np
+from time import perf_counter
+from pygame import Surface, SRCALPHA
+from pygame.font import Font
+
+
+__all__ = ['PHASES', 'PHASE_EVENTS', 'PHASE_UPDATE', 'PHASE_SIMULATE', 'PHASE_JOBS', 'PHASE_RENDER', 'PHASE_TICK',
+           'PHASE_FLIP', 'FrameProfiler']
+
+
+PHASES = ('events', 'update', 'simulate', 'jobs', 'render', 'tick', 'flip')
+PHASE_EVENTS, PHASE_UPDATE, PHASE_SIMULATE, PHASE_JOBS, PHASE_RENDER, PHASE_TICK, PHASE_FLIP = range(len(PHASES))
+
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler(object):
+    """
+    FrameProfiler - version 1.0
+
+    Ring buffer of per phase frame timings.  A frame is started with start(), each phase is closed with lap() in the
+    order the phases run, and end_frame() stores the row.  Times are stored in milliseconds.
+
+    Attributes
+    ----------
+    capacity : int
+        number of frames kept, older frames are overwritten
+    overlay_visible : bool
+        True if the overlay should be drawn
+    overlay_interval : float
+        seconds between overlay text refreshes, percentiles don't need recomputing every frame
+
+    Properties
+    ----------
+    frame_count : int
+        number of frames currently held in the buffer
+
+    Methods
+    -------
+    start() : None
+        marks the start of a frame
+    lap(int) : None
+        records the time since the last mark as the given phase
+    end_frame(str) : None
+        stores the current frame against a scene name
+    frames() : Tuple[np.ndarray, List[str]]
+        returns the buffered timings and scene names, oldest first
+    summary() : dict
+        returns p50/p95/p99 per phase and frame total for each scene in the buffer
+    draw_overlay(Surface, str) : Union[None, Rect]
+        draws the overlay, returns the area drawn to when the text was refreshed
+    dump(str) : str
+        writes the buffer to a .csv or .json file
+    """
+
+    def __init__(self, capacity=600, overlay_interval=0.5):
+        self.capacity = capacity
+        self.overlay_visible = False
+        self.overlay_interval = overlay_interval
+        self._times = np.zeros((capacity, len(PHASES)), dtype=np.float64)
+        self._scenes = [''] * capacity
+        self._index = 0
+        self._count = 0
+        self._current = [0.0] * len(PHASES)
+        self._mark = perf_counter()
+        self._font = None
+        self._overlay = None
+        self._overlay_time = 0.0
+
+    @property
+    def frame_count(self) -> int:
+        return self._count
+
+    def start(self) -> None:
+        self._mark = perf_counter()
+
+    def lap(self, phase: int) -> None:
+        now = perf_counter()
+        # a phase can run more than once a frame, add rather than overwrite
+        self._current[phase] += now - self._mark
+        self._mark = now
+
+    def end_frame(self, scene_name: str) -> None:
+        self._times[self._index] = self._current
+        self._times[self._index] *= 1000
+        self._scenes[self._index] = scene_name
+        self._index = (self._index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self._current = [0.0] * len(PHASES)
+
+    def frames(self) -> tuple:
+        """
+        Get the buffered frames in the order they were recorded
+        :return: Tuple[np.ndarray, List[str]] timings in ms shaped (frames, phases) and the scene of each frame
+        """
+        if self._count < self.capacity:
+            return self._times[:self._count].copy(), self._scenes[:self._count]
+        order = np.roll(np.arange(self.capacity), -self._index)
+        return self._times[order], [self._scenes[i] for i in order]
+
+    def summary(self) -> dict:
+        """
+        Percentiles of each phase and of the whole frame, per scene
+        :return: dict, scene name => {phase or 'total' => {'p50': float, 'p95': float, 'p99': float}, 'frames': int}
+        """
+        times, scenes = self.frames()
+        scene_names = np.array(scenes, dtype=object)
+        result = {}
+        for scene in dict.fromkeys(scenes):
+            rows = times[scene_names == scene]
+            columns = np.column_stack((rows, rows.sum(axis=1)))
+            values = np.percentile(columns, PERCENTILES, axis=0)
+            stats = {'frames': len(rows)}
+            for column, name in enumerate(PHASES + ('total',)):
+                stats[name] = {f"p{p}": float(values[i, column]) for i, p in enumerate(PERCENTILES)}
+            result[scene] = stats
+        return result
+
+    def draw_overlay(self, surface: Surface, scene_name: str):
+        """
+        Draw the timing overlay in the top right corner of a surface.  The text is rebuilt every overlay_interval
+        seconds, in between the last image is reused.
+        :param surface: Surface to draw onto
+        :param scene_name: str scene to show phase timings for
+        :return: Rect area of the overlay if the text was refreshed this call, otherwise None
+        """
+        refreshed = None
+        now = perf_counter()
+        if self._overlay is None or now - self._overlay_time >= self.overlay_interval:
+            self._overlay = self._build_overlay(scene_name)
+            self._overlay_time = now
+            refreshed = True
+        rect = self._overlay.get_rect(topright=surface.get_rect().topright)
+        surface.blit(self._overlay, rect)
+        if refreshed:
+            return rect
+        return None
+
+    def hide_overlay(self) -> None:
+        self.overlay_visible = False
+        self._overlay = None
+
+    def _build_overlay(self, scene_name: str) -> Surface:
+        if self._font is None:
+            self._font = Font(None, 20)
+        title = scene_name
+        rows = [('ms',) + tuple(f"p{p}" for p in PERCENTILES)]
+        if self._count:
+            summary = self.summary()
+            stats = summary.get(scene_name)
+            if stats is not None:
+                title = f"{scene_name} ({stats['frames']} frames)"
+                for name in PHASES + ('total',):
+                    rows.append((name,) + tuple(f"{v:.2f}" for v in stats[name].values()))
+            # other scenes still in the buffer only get their frame totals
+            for other, other_stats in summary.items():
+                if other != scene_name:
+                    rows.append((other,) + tuple(f"{v:.2f}" for v in other_stats['total'].values()))
+        white = (255, 255, 255)
+        title_text = self._font.render(title, True, white)
+        rendered = [[self._font.render(cell, True, white) for cell in row] for row in rows]
+        # the default font isn't monospaced, line the columns up by their widest cell
+        col_widths = [max(row[i].get_width() for row in rendered) + 10 for i in range(len(rows[0]))]
+        line_height = self._font.get_linesize()
+        width = max(sum(col_widths), title_text.get_width()) + 12
+        overlay = Surface((width, line_height * (len(rendered) + 1) + 12), SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        overlay.blit(title_text, (6, 6))
+        for y, row in enumerate(rendered, 1):
+            x = 6
+            for i, text in enumerate(row):
+                if i == 0:
+                    overlay.blit(text, (x, 6 + y * line_height))
+                else:
+                    # numbers are right aligned
+                    overlay.blit(text, (x + col_widths[i] - text.get_width(), 6 + y * line_height))
+                x += col_widths[i]
+        return overlay
+
+    def dump(self, file_path: str) -> str:
+        """
+        Write the buffered frames to a file, the format is picked from the extension (.csv or .json).  The JSON dump
+        includes the per scene summary along with the frames.
+        :param file_path: str
+        :return: str, the path written to
+        """
+        times, scenes = self.frames()
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if file_path.endswith('.csv'):
+            with open(file_path, 'w', newline='') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(('frame', 'scene') + PHASES + ('total',))
+                for i, (row, scene) in enumerate(zip(times, scenes)):
+                    writer.writerow([i, scene] + [f"{v:.4f}" for v in row] + [f"{row.sum():.4f}"])
+        elif file_path.endswith('.json'):
+            frames = [dict(zip(PHASES, row.tolist()), scene=scene) for row, scene in zip(times, scenes)]
+            with open(file_path, 'w') as handle:
+                json.dump({'phases': PHASES, 'units': 'ms', 'summary': self.summary(), 'frames': frames}, handle)
+        else:
+            raise ValueError(f"Unsupported profile dump format {file_path}")
+        logging.info(f"Frame profile with {len(scenes)} frames written to {file_path}")
+        return file_path
@@ -1,11 +1,14 @@
 """
 Module used to generate a random map.
 
-This isn't currently being used, working on making the generation code a bit more dynamic and flexible.
+Still a work in progress, the RandomMapGenerator holds the height mapping the random map scene adjusts with its sliders.
 """
 import random
-import noise
-from lib.structure import Grid
+import numpy as np
+from functools import partial
+from lib.noisefield import snoise2_array, noise_grid
+from lib.structure import Grid, ArrayGrid
+from lib.terrain import as_array, classify_heights, thresholds_from_mapping, cleanup_shoreline, run_pipeline
 
 
 # object oriented approach
@@ -14,6 +17,8 @@ class RandomMapGenerator(object):
     def __init__(self):
         self._def_height_map = {0: 0.48, 1: 0.49, 2: 0.5, 3: 0.55, 4: 0.57, 5: 0.6}
         self._cur_height_map = self._def_height_map.copy()
+        # height shift for each step of the 5 step adjustment scale
+        self._step_shift = {0: -0.04, 1: -0.02, 2: 0.0, 3: 0.02, 4: 0.04}
 
     def reset_height_map(self):
         self._cur_height_map = self._def_height_map.copy()
@@ -37,38 +42,41 @@ class RandomMapGenerator(object):
         if value == 2:
             return None
         # {0: 0.48, 1: 0.49, 2: 0.5, 3: 0.55, 4: 0.57, 5: 0.6}
-        if value == 0:      # Little to no water, water is replaced by grass, grass is dropped by a small amount
-            pass
-        elif value == 1:    # greatly reduced water
-            pass
-        elif value == 3:    # increased water
-            pass
-        elif value == 4:    # greatly increased water
-            pass
-        else:
+        # the shore moves with the water line, raising both gives more water, lowering both gives less
+        adjustments[0] += self._step_shift[value]
+        adjustments[1] += self._step_shift[value]
+
+    def adjust_grass(self, value: int, adjustments: dict):
+        if value == 2:
+            return None
+        # raising the top of the grass band widens it at the expense of the plains
+        adjustments[2] += self._step_shift[value]
+
+    def adjust_mountain(self, value: int, adjustments: dict):
+        if value == 2:
             return None
+        # more mountains means the mountain range has to start lower
+        adjustments[5] -= self._step_shift[value]
 
-    def apply_adjustments(self, water: int, grass: int, mountain: int):
+    def apply_adjustments(self, water: int, grass: int, mountain: int) -> dict:
         # this function receives a int value from 0 to 100, adjustments themselves are done to a 5 step scale ranging
         # from 0 to 4, therefore values are converted accordingly using 0=0-20, 1=21-40, 2=41-60 etc with 2 being the
         # baseline with which no change is made.
         adjustments = {0: 0.0, 1: 0.0, 2: 0.0, 3: 0.0, 4: 0.0, 5: 0.0}
-        water = self._convert_adjust_value(water)
-        if water != 2:
-            if water < 2:
-                if water == 1:
-                    pass
-                else:
-                    pass
-            else:
-                pass
-        grass = self._convert_adjust_value(grass)
-        if grass != 2:
-            pass
-        mountain = self._convert_adjust_value(mountain)
-        if mountain != 2:
-            pass
-        pass
+        self.adjust_water(self._convert_adjust_value(water), adjustments)
+        self.adjust_grass(self._convert_adjust_value(grass), adjustments)
+        self.adjust_mountain(self._convert_adjust_value(mountain), adjustments)
+        # adjustments are always made from the defaults so they don't stack up, and each height has to stay at or above
+        # the one below it or the tiers would overlap
+        floor = 0.0
+        for h_value in sorted(self._def_height_map.keys()):
+            floor = max(floor, self._def_height_map[h_value] + adjustments[h_value])
+            self._cur_height_map[h_value] = floor
+        return self.height_map
+
+    @property
+    def height_map(self) -> dict:
+        return self._cur_height_map.copy()
 
 
 # the default height map, should not be directly adjusted
@@ -78,55 +86,20 @@ _def_height_map = {
 
 
 def cleanup_map_shoreline(height_map: Grid):
-    # First pass, we look for water tiles that have non-shore neighbors.  Any tile bordering water must be shore
-    for y in range(height_map.height):
-        for x in range(height_map.width):
-            if height_map[(x, y)] == 0:
-                for n_y in range(y-1, y+2):
-                    for n_x in range(x-1, x+2):
-                        try:
-                            n_v = height_map[(n_x, n_y)]
-                            if n_v != 0 and n_v != 1:
-                                height_map[(n_x, n_y)] = 1
-                        except IndexError:
-                            pass
-    # next we want to make sure any tiles bordering a shore tile are either water, shore or grass
-    for y in range(height_map.height):
-        for x in range(height_map.width):
-            if height_map[(x, y)] == 1:
-                for n_y in range(y-1, y+2):
-                    for n_x in range(x-1, x+2):
-                        try:
-                            n_v = height_map[(n_x, n_y)]
-                            if n_v != 0 and n_v != 1:
-                                height_map[(n_x, n_y)] = 2
-                        except IndexError:
-                            pass
-    # last, we want to make sure all shore tiles are within 4 tiles of a water tile
-    for y in range(height_map.height):
-        for x in range(height_map.width):
-            # if tile is a shore tile, we want to make sure it's within 4 tiles of water, otherwise it needs to be
-            # a grass tile
-            if height_map[(x, y)] == 1:
-                change_me = True
-                for n_y in range(y-4, y+5):
-                    for n_x in range(x-4, x+5):
-                        try:
-                            n_v = height_map[(n_x, n_y)]
-                            if n_v == 0:
-                                change_me = False
-                        except IndexError:
-                            pass
-                        if not change_me:
-                            continue
-                    if not change_me:
-                        continue
-                if change_me:
-                    height_map[(x, y)] = 2
+    # shoreline rules are applied by the cleanup_shoreline stage, this just writes the result back into the grid
+    cleaned = cleanup_shoreline(as_array(height_map))
+    if isinstance(height_map, ArrayGrid):
+        height_map.array[:] = cleaned
+    else:
+        for y in range(height_map.height):
+            for x in range(height_map.width):
+                height_map[(x, y)] = int(cleaned[y, x])
 
 
 def map_height_value(value: float, height_mapping: dict) -> int:
-    r_value = 0
+    # we always choose the lowest height value whose range the value falls under, anything above every range is the
+    # highest tile type
+    r_value = len(height_mapping)
     for h_value, h_range in height_mapping.items():
         # if the value is less than the height range
         if value < h_range:
@@ -137,19 +110,32 @@ def map_height_value(value: float, height_mapping: dict) -> int:
     return r_value
 
 
-def generate_height_map(map_width: int, map_height: int, height_mapping: dict, gen_seed=None) -> Grid:
+def build_height_map(noise_values: np.ndarray, height_mapping: dict) -> ArrayGrid:
+    """
+    Turn a noise field (values 0.0 - 1.0) into a height map, the noise is classified using the height mapping and then
+    the shoreline is cleaned up.  This is the cheap part of generation, so it can be re-run on a cached noise field
+    whenever the height mapping changes.
+    :param noise_values: np.ndarray
+    :param height_mapping: dict
+    :return: ArrayGrid
+    """
+    return ArrayGrid.from_array(run_pipeline(
+        noise_values, partial(classify_heights, thresholds=thresholds_from_mapping(height_mapping)), cleanup_shoreline))
+
+
+def generate_height_map(map_width: int, map_height: int, height_mapping: dict, gen_seed=None,
+                        workers=1, progress=None) -> ArrayGrid:
+    # use a local RNG rather than seeding the random module, the offsets are drawn once here and handed to every tile
+    # so the map doesn't depend on how the work is split up
+    rng = random.Random()
     if gen_seed is not None:
-        random.seed(gen_seed)
-    x_seed = random.randint(-1024, 1024)
-    y_seed = random.randint(-1024, 1024)
+        rng.seed(gen_seed)
+    x_seed = rng.randint(-1024, 1024)
+    y_seed = rng.randint(-1024, 1024)
     scale = 0.08
-    world = Grid(map_width, map_height)
-    for y in range(map_height):
-        for x in range(map_width):
-            val = noise.snoise2((x + x_seed) * scale, (y + y_seed) * scale, octaves=6, persistence=1.2, lacunarity=0.7,
-                                base=1, repeaty=32, repeatx=32)
-            val += 1.0
-            val *= 0.5
-            world[(x, y)] = map_height_value(val, height_mapping)
-    cleanup_map_shoreline(world)
-    return world
+    values = noise_grid(snoise2_array, map_width, map_height, x_seed, y_seed, scale, octaves=6, persistence=1.2,
+                        lacunarity=0.7, base=1, repeaty=32, repeatx=32, workers=workers,
+                        progress=progress)
+    # shift/scale in double precision, same as the per-cell version did with the float returned by snoise2
+    values = (values.astype(np.float64) + 1.0) * 0.5
+    return build_height_map(values, height_mapping)
@@ -0,0 +1,200 @@
+"""
+Render Module
+
+Functions for turning tile grids into images.  Everything here works on whole arrays of tile ids, pixels are written in
+bulk through surfarray rather than one set_at call per cell.
+"""
+import numpy as np
+from collections import OrderedDict
+from pygame import Rect, Surface, surfarray
+from pygame.transform import scale
+from lib.const import *
+from typing import Union, Tuple
+from lib.structure import Grid, RectGrid
+
+
+__all__ = ['TILE_COLORS', 'tile_palette', 'render_tile_preview', 'TileMapRenderer']
+
+
+# colors for representing terrain types
+TILE_COLORS = {
+    TILE_WATER: (40, 53, 147), TILE_SHORE: (255, 204, 128), TILE_LOWLAND: (43, 175, 43), TILE_MIDLAND: (85, 139, 47),
+    TILE_HIGHLAND: (158, 157, 36), TILE_HILLS: (141, 110, 99), TILE_MOUNTAINS: (66, 66, 66)
+}
+
+
+def tile_palette(colors=None) -> list:
+    """
+    Build a full 256 entry palette for an 8-bit surface, tile id N uses palette entry N and unused entries are black
+    :param colors: dict of tile id => color, defaults to TILE_COLORS
+    :return: list
+    """
+    if colors is None:
+        colors = TILE_COLORS
+    return [colors.get(index, (0, 0, 0)) for index in range(256)]
+
+
+def render_tile_preview(tiles: np.ndarray, target: Surface, colors=None) -> Surface:
+    """
+    Draw a grid of tile ids onto a target surface, one pixel per tile, centered on the target.  Grids larger than the
+    target are block sampled down (every Nth tile in each direction) until they fit.
+
+    The tile ids are written into an 8-bit surface in one go using the tile ids as palette indices, then that surface
+    is blit onto the target which takes care of the conversion to the target's pixel format.
+    :param tiles: 2D np.ndarray of tile ids, shaped (height, width)
+    :param target: Surface to draw on, it's filled with black first
+    :param colors: dict of tile id => color, defaults to TILE_COLORS
+    :return: Surface, the target
+    """
+    t_w, t_h = target.get_size()
+    step = max(1, -(-tiles.shape[1] // t_w), -(-tiles.shape[0] // t_h))
+    sampled = tiles[::step, ::step]
+    indexed = Surface((sampled.shape[1], sampled.shape[0]), depth=8)
+    indexed.set_palette(tile_palette(colors))
+    # surfarray is indexed [x, y] so the row major tile array needs transposing
+    surfarray.blit_array(indexed, sampled.T.astype(np.uint8, copy=False))
+    target.fill((0, 0, 0))
+    target.blit(indexed, ((t_w - sampled.shape[1]) // 2, (t_h - sampled.shape[0]) // 2))
+    return target
+
+
+class TileMapRenderer(object):
+    """
+    TileMapRenderer - version 1.2
+
+    Renders a tile map by pre-rendering square chunks of tiles into cached surfaces.  Each frame only the chunks that
+    overlap the camera are blit, so the cost of a frame depends on the screen size rather than the map size.  Chunks
+    are rendered the first time they're seen and kept in an LRU cache, when tiles change only the chunks holding them
+    are thrown away and re-rendered.
+
+    The cache is bounded in bytes, a chunk is a full colour surface (16 tiles of 32 pixels is 1MB) so a count of
+    chunks says little about the memory used.  Chunks that were on screen in the last render are never evicted, if
+    the budget is smaller than the view the cache holds the view and nothing more.
+
+    Chunk positions come from a computed RectGrid with one cell per chunk, culling asks it for the range of chunks
+    under the camera so nothing outside the view is looked at.  A second computed RectGrid with one cell per tile
+    handles picking.
+
+    Attributes
+    ----------
+    tiles : np.ndarray
+        tile ids, shaped (height, width), this is the backing array of the grid passed in so changes to the grid show
+        up once the changed area is invalidated
+    tile_size : int
+        size of a tile on screen in pixels
+    chunk_tiles : int
+        number of tiles along each side of a chunk
+    chunks : RectGrid
+        world space Rect for each chunk
+    cells : RectGrid
+        world space Rect for each tile
+    max_cache_bytes : int
+        memory the cached chunk surfaces may use
+
+    Properties
+    ----------
+    cache_bytes : int
+        memory used by the cached chunk surfaces
+
+    Methods
+    -------
+    render(Surface, Rect) : int
+        draws the part of the map under the camera, returns the number of chunks drawn
+    tile_at(Tuple[int, int], Rect) : Union[None, Tuple[int, int]]
+        returns the tile under a screen position
+    set_tile(int, int, int) : None
+        changes a tile and invalidates its chunk
+    invalidate(int, int, int, int) : None
+        throws away cached chunks covering an area of tiles
+    """
+
+    def __init__(self, grid: Grid, tile_size=32, chunk_tiles=16, max_cache_bytes=32 * 1024 * 1024, colors=None):
+        self.tiles = np.asarray(grid)
+        self.tile_size = tile_size
+        self.chunk_tiles = chunk_tiles
+        self.max_cache_bytes = max_cache_bytes
+        self._palette = tile_palette(colors)
+        chunk_px = tile_size * chunk_tiles
+        self.chunks = RectGrid(-(-self.tiles.shape[1] // chunk_tiles), -(-self.tiles.shape[0] // chunk_tiles),
+                               chunk_px, chunk_px, computed=True)
+        self.cells = RectGrid(self.tiles.shape[1], self.tiles.shape[0], tile_size, tile_size, computed=True)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        # number of chunks drawn by the last render, these are the newest in the cache and are never evicted
+        self._visible_chunks = 0
+
+    @property
+    def cache_bytes(self) -> int:
+        return self._cache_bytes
+
+    @property
+    def world_size(self) -> tuple:
+        return self.tiles.shape[1] * self.tile_size, self.tiles.shape[0] * self.tile_size
+
+    def _render_chunk(self, c_x: int, c_y: int) -> Surface:
+        x, y = c_x * self.chunk_tiles, c_y * self.chunk_tiles
+        block = self.tiles[y:y + self.chunk_tiles, x:x + self.chunk_tiles]
+        indexed = Surface((block.shape[1], block.shape[0]), depth=8)
+        indexed.set_palette(self._palette)
+        surfarray.blit_array(indexed, block.T.astype(np.uint8, copy=False))
+        # scale the one pixel per tile image up to the tile size, then convert so blitting it is a straight copy
+        return scale(indexed, (block.shape[1] * self.tile_size, block.shape[0] * self.tile_size)).convert()
+
+    @staticmethod
+    def _chunk_bytes(chunk: Surface) -> int:
+        return chunk.get_pitch() * chunk.get_height()
+
+    def _get_chunk(self, c_x: int, c_y: int) -> Surface:
+        key = (c_x, c_y)
+        chunk = self._cache.get(key)
+        if chunk is None:
+            chunk = self._render_chunk(c_x, c_y)
+            self._cache[key] = chunk
+            self._cache_bytes += self._chunk_bytes(chunk)
+            while self._cache_bytes > self.max_cache_bytes and len(self._cache) > self._visible_chunks + 1:
+                self._cache_bytes -= self._chunk_bytes(self._cache.popitem(last=False)[1])
+        else:
+            self._cache.move_to_end(key)
+        return chunk
+
+    def render(self, surface: Surface, camera: Rect) -> int:
+        """
+        Draw the map onto a surface, the camera is the area of the world (in pixels) to show
+        :param surface: Surface
+        :param camera: Rect
+        :return: int, number of chunks drawn
+        """
+        drawn = 0
+        for c_x, c_y, chunk_rect in self.chunks.iter_visible(camera):
+            surface.blit(self._get_chunk(c_x, c_y), (chunk_rect.x - camera.x, chunk_rect.y - camera.y))
+            drawn += 1
+        self._visible_chunks = drawn
+        return drawn
+
+    def tile_at(self, screen_pos: Tuple[int, int], camera: Rect) -> Union[None, Tuple[int, int]]:
+        """
+        Find the tile under a screen position, e.g. the mouse
+        :param screen_pos: Tuple[int, int] position on the surface the map is rendered to
+        :param camera: Rect the camera the map was rendered with
+        :return: Tuple[int, int] tile coordinates or None if there's no tile there
+        """
+        return self.cells.cell_at(screen_pos[0] + camera.x, screen_pos[1] + camera.y)
+
+    def invalidate(self, x: int, y: int, width=1, height=1) -> None:
+        """
+        Throw away the cached chunks that cover an area of tiles, they're re-rendered the next time they're visible
+        :param x: int, tile X
+        :param y: int, tile Y
+        :param width: int, width of the area in tiles
+        :param height: int, height of the area in tiles
+        :return: None
+        """
+        for c_y in range(y // self.chunk_tiles, (y + height - 1) // self.chunk_tiles + 1):
+            for c_x in range(x // self.chunk_tiles, (x + width - 1) // self.chunk_tiles + 1):
+                chunk = self._cache.pop((c_x, c_y), None)
+                if chunk is not None:
+                    self._cache_bytes -= self._chunk_bytes(chunk)
+
+    def set_tile(self, x: int, y: int, tile_id: int) -> None:
+        self.tiles[y, x] = tile_id
+        self.invalidate(x, y)
@@ -0,0 +1,204 @@
+"""
+Job scheduler module
+
+Runs long jobs a slice at a time on the main thread, in the time left over in a frame.  Where the background worker
+moves a job to another thread, the scheduler is for work that has to touch game state (or the display) and for jobs
+that are easy to break up, generating a map row by row or saving a chunk at a time.
+
+A job is a generator, every yield is a point where the scheduler can stop it and carry on next frame.  A job can
+yield a float 0.0 - 1.0 to report its progress, anything else is ignored.  The value it returns is its result.
+
+def build_rows(grid):
+    for y in range(grid.height):
+        build_row(grid, y)
+        yield (y + 1) / grid.height
+    return grid
+
+job_id = scheduler.submit(build_rows(grid))
+
+Jobs report back through the event bus the same way background worker jobs do, every event carries the job_id of the
+job that posted it.  Progress is posted at most once a frame per job.
+"""
+import heapq
+import logging
+from itertools import count
+from time import perf_counter
+from lib.eventbus import post_event, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from lib.const import JOB_PROGRESS, JOB_COMPLETE, JOB_CANCELLED, JOB_FAILED
+
+
+__all__ = ['Scheduler', 'PRIORITY_HIGH', 'PRIORITY_NORMAL', 'PRIORITY_LOW']
+
+
+class _ScheduledJob(object):
+
+    __slots__ = ('job_id', 'name', 'priority', 'generator', 'progress', 'reported', 'cancelled')
+
+    def __init__(self, job_id: int, name: str, priority: int, generator):
+        self.job_id = job_id
+        self.name = name
+        self.priority = priority
+        self.generator = generator
+        self.progress = 0.0
+        self.reported = 0.0
+        self.cancelled = False
+
+
+class Scheduler(object):
+    """
+    Scheduler - version 1.0
+
+    Cooperative scheduler for generator jobs.  Each call to run steps jobs until the frame budget is used up, the job
+    with the highest priority (lowest number, same as the event bus priorities) goes first and jobs of the same
+    priority take turns a step at a time.  A higher priority job runs to completion before a lower one gets a step.
+
+    The budget is checked between steps, so a job should keep its steps well under it, a step that runs long makes
+    the frame run long.  At least one step is run every call so jobs always move forward.
+
+    Attributes
+    ----------
+    budget_ms : float
+        time each call to run may spend stepping jobs
+
+    Properties
+    ----------
+    busy : bool
+        True if there are jobs waiting
+    job_count : int
+        number of jobs waiting
+
+    Methods
+    -------
+    submit(Generator, int, str) : int
+        adds a job, returns its job ID
+    cancel(int) : bool
+        cancels a job, returns False if the job isn't waiting
+    cancel_all() : None
+        cancels every job
+    progress(int) : Union[None, float]
+        last progress reported by a job
+    run(float) : int
+        steps jobs for up to the budget, returns the number of steps run
+    """
+
+    _job_ids = count(1)
+
+    def __init__(self, budget_ms=4.0):
+        self.budget_ms = budget_ms
+        # (priority, sequence, job), the sequence keeps equal priority jobs taking turns in order
+        self._queue = []
+        self._jobs = {}
+        self._sequence = count()
+        # the job being stepped, it can't be closed until it yields
+        self._running = None
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._jobs)
+
+    @property
+    def job_count(self) -> int:
+        return len(self._jobs)
+
+    def submit(self, generator, priority=PRIORITY_NORMAL, name=None) -> int:
+        """
+        Add a job to the scheduler, it gets its first step on the next run
+        :param generator: Generator, the job
+        :param priority: int, PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        :param name: str, shown in the log, defaults to the generator's name
+        :return: int, the job ID
+        """
+        job = _ScheduledJob(next(self._job_ids), name or getattr(generator, '__name__', 'job'), priority, generator)
+        self._jobs[job.job_id] = job
+        heapq.heappush(self._queue, (priority, next(self._sequence), job))
+        logging.debug(f"Scheduled job {job.job_id} ({job.name}) submitted")
+        return job.job_id
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a job, the generator is closed right away and a cancelled event is posted.  A job can cancel itself or
+        another job from inside its step, a job cancelling itself is closed once it yields.
+        :param job_id: int
+        :return: bool, False if there's no such job waiting
+        """
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        # the queue entry is dropped when it comes up
+        job.cancelled = True
+        if job is not self._running:
+            job.generator.close()
+        logging.debug(f"Scheduled job {job_id} ({job.name}) cancelled")
+        post_event(JOB_CANCELLED, job_id=job_id, name=job.name)
+        return True
+
+    def cancel_all(self) -> None:
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+        self._queue.clear()
+
+    def progress(self, job_id: int):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return job.progress
+
+    def run(self, budget_ms: float = None) -> int:
+        """
+        Step jobs until the budget runs out or there's nothing left to run
+        :param budget_ms: float, overrides budget_ms for this call
+        :return: int, the number of steps run
+        """
+        if not self._jobs:
+            # anything left in the queue was cancelled
+            self._queue.clear()
+            return 0
+        queue = self._queue
+        deadline = perf_counter() + (self.budget_ms if budget_ms is None else budget_ms) / 1000
+        stepped = {}
+        steps = 0
+        while queue:
+            priority, _, job = heapq.heappop(queue)
+            if job.cancelled:
+                continue
+            steps += 1
+            if self._step(job):
+                heapq.heappush(queue, (priority, next(self._sequence), job))
+                stepped[job.job_id] = job
+            if perf_counter() >= deadline:
+                break
+        jobs = self._jobs
+        for job in stepped.values():
+            # finished and cancelled jobs have posted their last event already
+            if job.job_id in jobs and job.progress != job.reported:
+                job.reported = job.progress
+                post_event(JOB_PROGRESS, job_id=job.job_id, name=job.name, progress=job.progress)
+        return steps
+
+    def _step(self, job: _ScheduledJob) -> bool:
+        # returns True while the job has more to do
+        self._running = job
+        try:
+            value = next(job.generator)
+        except StopIteration as e:
+            self._jobs.pop(job.job_id, None)
+            # a job that cancelled itself on its last step has already posted its cancelled event
+            if not job.cancelled:
+                logging.debug(f"Scheduled job {job.job_id} ({job.name}) complete")
+                post_event(JOB_COMPLETE, job_id=job.job_id, name=job.name, result=e.value)
+            return False
+        except Exception as e:
+            self._jobs.pop(job.job_id, None)
+            if not job.cancelled:
+                logging.exception(f"Scheduled job {job.job_id} ({job.name}) failed")
+                post_event(JOB_FAILED, job_id=job.job_id, name=job.name, error=e)
+            return False
+        finally:
+            self._running = None
+        if job.cancelled:
+            # cancelled itself during the step
+            job.generator.close()
+            return False
+        if type(value) is float:
+            job.progress = value
+        return True
@@ -1,5 +1,15 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from collections import OrderedDict
 from pygame import Rect
-from typing import Union, Any, Tuple
+from typing import Union, Any, Tuple, Iterator
+
+
+# default dtypes for ArrayGrid storage, tile ids fit in a byte and heights don't need double precision
+TILE_DTYPE = np.uint8
+HEIGHT_DTYPE = np.float32
 
 
 class Grid(object):
@@ -99,34 +109,308 @@ class SafeGrid(Grid):
             return None
 
 
+class ArrayGrid(Grid):
+    """
+    ArrayGrid - version 1.0
+    Subclass of Grid
+
+    NumPy backed version of the Grid class.  Cells are stored in a single 2D array of a fixed dtype (TILE_DTYPE for
+    tile ids, HEIGHT_DTYPE for height/noise values) instead of a list of lists of Python objects.  Indexing follows the
+    same (x, y) order as the Grid class, the backing array itself is stored row major as [y, x].
+
+    Slices are supported in either position of the coordinate and return a view into the backing array, for example
+    grid[0:16, 0:16] returns the top left 16x16 block and grid[:, 4] returns row 4.  Assignment accepts the same slices
+    and broadcasts scalar values.
+
+    Attributes
+    ----------
+    _fill : Any
+        private value used for new cells and for deleted cells
+
+    Properties
+    ----------
+    array : np.ndarray
+        returns the backing array, shaped (height, width)
+    dtype : np.dtype
+        returns the dtype of the backing array
+
+    Methods
+    -------
+    from_array(np.ndarray) : ArrayGrid
+        class method, wraps an existing (height, width) array without copying it
+    view() : ArrayGrid
+        returns a new ArrayGrid that shares the same backing array
+    copy() : ArrayGrid
+        returns a new ArrayGrid with a copy of the backing array
+    fill(Any) : None
+        sets every cell to the given value
+    """
+
+    def __init__(self, width: int, height: int, dtype=TILE_DTYPE, fill=0):
+        # Grid.__init__ is skipped on purpose, it would allocate the list of lists we're replacing
+        self._w, self._h = width, height
+        self._fill = fill
+        self._grid = np.full((height, width), fill, dtype=dtype)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, fill=0) -> 'ArrayGrid':
+        if array.ndim != 2:
+            raise ValueError(f"ArrayGrid requires a 2D array, got {array.ndim} dimensions")
+        grid = cls.__new__(cls)
+        grid._h, grid._w = array.shape
+        grid._fill = fill
+        grid._grid = array
+        return grid
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._grid
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._grid.dtype
+
+    def __array__(self, dtype=None, copy=None):
+        # numpy 2 passes copy, np.array(grid) must not hand back the grid's own storage
+        if dtype is None:
+            return self._grid.copy() if copy else self._grid
+        return self._grid.astype(dtype, copy=bool(copy))
+
+    def __getitem__(self, coord: Tuple[Union[int, slice], Union[int, slice]]) -> Any:
+        return self._grid[coord[1], coord[0]]
+
+    def __setitem__(self, coord: Tuple[Union[int, slice], Union[int, slice]], value: Any):
+        self._grid[coord[1], coord[0]] = value
+
+    def __delitem__(self, coord: Tuple[Union[int, slice], Union[int, slice]]):
+        self._grid[coord[1], coord[0]] = self._fill
+
+    def view(self) -> 'ArrayGrid':
+        return ArrayGrid.from_array(self._grid, self._fill)
+
+    def copy(self) -> 'ArrayGrid':
+        return ArrayGrid.from_array(self._grid.copy(), self._fill)
+
+    def fill(self, value: Any) -> None:
+        self._grid.fill(value)
+
+
+class ChunkedGrid(Grid):
+    """
+    ChunkedGrid - version 1.0
+    Subclass of Grid
+
+    Sparse, chunked version of the Grid class for very large worlds.  The grid is split into square chunks of
+    chunk_size x chunk_size cells, each chunk is a NumPy array that is only allocated the first time a cell inside of it
+    is written to.  Reading from a chunk that was never written returns the fill value without allocating anything.
+
+    A memory budget (in bytes) can be set, when the allocated chunks exceed the budget the least recently used chunks
+    are evicted.  Evicted chunks that only hold the fill value are simply dropped, any others are spilled to disk and
+    loaded back in when they are next accessed.  If no spill directory is given a temporary one is created on first
+    spill and removed by close().
+
+    Unlike Grid, coordinates outside of the grid (including negative ones) raise an IndexError rather than wrapping.
+
+    Attributes
+    ----------
+    _cs : int
+        private chunk size (cells per side)
+    _chunks : OrderedDict[Tuple[int, int], np.ndarray]
+        private map of in memory chunks, ordered least to most recently used
+    _spilled : Dict[Tuple[int, int], str]
+        private map of chunks that have been spilled to disk and their file paths
+
+    Properties
+    ----------
+    chunk_size : int
+        returns the chunk size
+    memory_budget : Union[None, int]
+        gets or sets the memory budget in bytes, None disables eviction
+    memory_used : int
+        returns the bytes used by in memory chunks
+    allocated_chunks : int
+        returns the number of in memory chunks
+    spilled_chunks : int
+        returns the number of chunks currently spilled to disk
+
+    Methods
+    -------
+    close() : None
+        drops all chunks and removes any temporary spill files
+    """
+
+    def __init__(self, width: int, height: int, chunk_size=64, dtype=TILE_DTYPE, fill=0, memory_budget=None,
+                 spill_dir=None):
+        # Grid.__init__ is skipped on purpose, the whole point is not to allocate every cell up front
+        self._w, self._h = width, height
+        self._cs = chunk_size
+        self._dtype = np.dtype(dtype)
+        self._fill = fill
+        self._budget = memory_budget
+        self._spill_dir = spill_dir
+        self._tmp_dir = None
+        self._chunks = OrderedDict()
+        self._spilled = {}
+
+    @property
+    def chunk_size(self) -> int:
+        return self._cs
+
+    @property
+    def memory_budget(self) -> Union[None, int]:
+        return self._budget
+
+    @memory_budget.setter
+    def memory_budget(self, value: Union[None, int]):
+        self._budget = value
+        self._enforce_budget()
+
+    @property
+    def memory_used(self) -> int:
+        return len(self._chunks) * self._cs * self._cs * self._dtype.itemsize
+
+    @property
+    def allocated_chunks(self) -> int:
+        return len(self._chunks)
+
+    @property
+    def spilled_chunks(self) -> int:
+        return len(self._spilled)
+
+    def _locate(self, coord: Tuple[int, int]) -> Tuple[Tuple[int, int], int, int]:
+        x, y = coord
+        if not (0 <= x < self._w and 0 <= y < self._h):
+            raise IndexError(f"Coordinate {coord} is outside of the {self._w}x{self._h} grid")
+        c_x, l_x = divmod(x, self._cs)
+        c_y, l_y = divmod(y, self._cs)
+        return (c_x, c_y), l_x, l_y
+
+    def _get_chunk(self, key: Tuple[int, int], allocate: bool) -> Union[None, np.ndarray]:
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        if key in self._spilled:
+            path = self._spilled.pop(key)
+            chunk = np.load(path)
+            os.remove(path)
+        elif allocate:
+            chunk = np.full((self._cs, self._cs), self._fill, dtype=self._dtype)
+        else:
+            return None
+        self._chunks[key] = chunk
+        self._enforce_budget()
+        return chunk
+
+    def _enforce_budget(self):
+        if self._budget is None:
+            return None
+        # always keep the most recently used chunk, otherwise a tiny budget would evict the chunk being accessed
+        while self.memory_used > self._budget and len(self._chunks) > 1:
+            key, chunk = self._chunks.popitem(last=False)
+            if not (chunk == self._fill).all():
+                self._spill(key, chunk)
+
+    def _spill(self, key: Tuple[int, int], chunk: np.ndarray):
+        if self._spill_dir is None:
+            if self._tmp_dir is None:
+                self._tmp_dir = tempfile.mkdtemp(prefix='microworld_chunks_')
+            spill_dir = self._tmp_dir
+        else:
+            spill_dir = self._spill_dir
+        path = os.path.join(spill_dir, f"chunk_{id(self)}_{key[0]}_{key[1]}.npy")
+        np.save(path, chunk)
+        self._spilled[key] = path
+
+    def close(self) -> None:
+        for path in self._spilled.values():
+            if os.path.isfile(path):
+                os.remove(path)
+        self._spilled.clear()
+        self._chunks.clear()
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+    def __getitem__(self, coord: Tuple[int, int]) -> Any:
+        key, l_x, l_y = self._locate(coord)
+        chunk = self._get_chunk(key, False)
+        if chunk is None:
+            return self._fill
+        return chunk[l_y, l_x]
+
+    def __setitem__(self, coord: Tuple[int, int], value: Any):
+        key, l_x, l_y = self._locate(coord)
+        self._get_chunk(key, True)[l_y, l_x] = value
+
+    def __delitem__(self, coord: Tuple[int, int]):
+        key, l_x, l_y = self._locate(coord)
+        chunk = self._get_chunk(key, False)
+        if chunk is not None:
+            chunk[l_y, l_x] = self._fill
+
+
 class RectGrid(Grid):
     """
-    RectGrid - version 1.0
+    RectGrid - version 1.1
     Subclass of Grid
 
     Builds a Grid of Rect objects to cover an area.  Takes extra cell size parameters and constructs a Rect for each
     cell that represents the area of the cell.
 
+    With computed=True no Rects are stored at all, each cell Rect is built on demand from the cell size.  Memory and
+    construction cost stay constant regardless of the grid area, which is what large maps want.
+
     Attributes
     ----------
     _cw : int
         private width of each individual cell
     _ch : int
         private height of each individual cell
+    _computed : bool
+        private flag, True if cell Rects are built on demand instead of stored
+
+    Properties
+    ----------
+    cell_width : int
+        width of each cell in pixels
+    cell_height : int
+        height of each cell in pixels
+    computed : bool
+        True if the grid builds its Rects on demand
+    pixel_width : int
+        total width covered by the grid in pixels
+    pixel_height : int
+        total height covered by the grid in pixels
 
     Methods
     -------
     Note, inherits the same methods as the Grid class, however, set and del item methods are disabled and will throw
     NotImplemented errors.  This is to prevent deleting or overwriting of Rect data at a Cell.
+    cell_at(int, int) : Union[None, Tuple[int, int]]
+        returns the cell containing a pixel position or None if the position is outside the grid
+    visible_range(Rect) : Tuple[int, int, int, int]
+        returns the (x0, y0, x1, y1) range of cells that overlap a rect, x1 and y1 are exclusive
+    iter_range(int, int, int, int) : Iterator[Tuple[int, int, Rect]]
+        yields the cell coordinates and Rect of every cell in a range, row by row
+    iter_visible(Rect) : Iterator[Tuple[int, int, Rect]]
+        yields the cell coordinates and Rect of every cell that overlaps a rect
     """
 
-    def __init__(self, width: int, height: int, cell_width: int, cell_height: int):
-        super().__init__(width, height)
+    def __init__(self, width: int, height: int, cell_width: int, cell_height: int, computed: bool = False):
         self._cw, self._ch = cell_width, cell_height
+        self._computed = computed
+        if computed:
+            # skip the Grid allocation, there's nothing to store
+            self._w, self._h = width, height
+            self._grid = None
+            return
+        super().__init__(width, height)
         for y in range(self.height):
             for x in range(self.width):
                 r = Rect(x * cell_width, y * cell_height, cell_width, cell_height)
-                self[(x, y)] = r
+                # write to the list directly, assignment through self[] is disabled
+                self._grid[y][x] = r
 
     @property
     def cell_width(self) -> int:
@@ -136,8 +420,82 @@ class RectGrid(Grid):
     def cell_height(self) -> int:
         return self._ch
 
+    @property
+    def computed(self) -> bool:
+        return self._computed
+
+    @property
+    def pixel_width(self) -> int:
+        return self._w * self._cw
+
+    @property
+    def pixel_height(self) -> int:
+        return self._h * self._ch
+
+    def __getitem__(self, coord: Tuple[int, int]) -> Union[None, Any]:
+        if not self._computed:
+            return self._grid[coord[1]][coord[0]]
+        x, y = coord
+        if not (0 <= x < self._w and 0 <= y < self._h):
+            raise IndexError("cell {} is outside of the grid".format(coord))
+        return Rect(x * self._cw, y * self._ch, self._cw, self._ch)
+
     def __setitem__(self, coord: Tuple[int, int], value: Union[None, Any]):
-        raise NotImplemented("RectGrid does not support assignment")
+        raise NotImplementedError("RectGrid does not support assignment")
 
     def __delitem__(self, coord: Tuple[int, int]):
-        raise NotImplemented("RectGrid does not support deletion")
+        raise NotImplementedError("RectGrid does not support deletion")
+
+    def cell_at(self, px: int, py: int) -> Union[None, Tuple[int, int]]:
+        """
+        Convert a pixel position into the cell that contains it
+        :param px: int x pixel position relative to the grid origin
+        :param py: int y pixel position relative to the grid origin
+        :return: Tuple[int, int] cell coordinates or None if the position is outside the grid
+        """
+        x, y = int(px // self._cw), int(py // self._ch)
+        if 0 <= x < self._w and 0 <= y < self._h:
+            return x, y
+        return None
+
+    def visible_range(self, rect: Rect) -> Tuple[int, int, int, int]:
+        """
+        Find the range of cells that overlap a rect, usually a camera or viewport.  The range is clamped to the grid,
+        when nothing overlaps the range is empty (x0 == x1 or y0 == y1).
+        :param rect: Rect area in grid pixel space
+        :return: Tuple[int, int, int, int] x0, y0, x1, y1 with x1 and y1 exclusive
+        """
+        x0 = min(max(rect.left // self._cw, 0), self._w)
+        y0 = min(max(rect.top // self._ch, 0), self._h)
+        # ceil division on the far edge so a partially covered cell is included
+        x1 = min(max(-(-rect.right // self._cw), x0), self._w)
+        y1 = min(max(-(-rect.bottom // self._ch), y0), self._h)
+        return x0, y0, x1, y1
+
+    def iter_range(self, x0: int, y0: int, x1: int, y1: int) -> Iterator[Tuple[int, int, Rect]]:
+        """
+        Iterate the cells of a range row by row
+        :param x0: int first column
+        :param y0: int first row
+        :param x1: int column to stop at, exclusive
+        :param y1: int row to stop at, exclusive
+        :return: Iterator[Tuple[int, int, Rect]] yielding x, y and the cell Rect
+        """
+        cw, ch = self._cw, self._ch
+        for y in range(y0, y1):
+            if self._computed:
+                top = y * ch
+                for x in range(x0, x1):
+                    yield x, y, Rect(x * cw, top, cw, ch)
+            else:
+                row = self._grid[y]
+                for x in range(x0, x1):
+                    yield x, y, row[x]
+
+    def iter_visible(self, rect: Rect) -> Iterator[Tuple[int, int, Rect]]:
+        """
+        Iterate the cells that overlap a rect
+        :param rect: Rect area in grid pixel space
+        :return: Iterator[Tuple[int, int, Rect]] yielding x, y and the cell Rect
+        """
+        return self.iter_range(*self.visible_range(rect))
@@ -0,0 +1,129 @@
+"""
+Terrain Module
+
+Stages for turning generated noise into terrain.  Each stage works on a whole NumPy array at once rather than looping
+over the cells of a Grid.
+"""
+import numpy as np
+from lib.const import TILE_WATER, TILE_SHORE, TILE_LOWLAND
+from lib.structure import Grid, ArrayGrid, TILE_DTYPE
+
+
+__all__ = ['as_array', 'thresholds_from_mapping', 'classify_heights', 'dilate', 'distance_to', 'cleanup_shoreline',
+           'run_pipeline']
+
+# shore tiles further than this from water (in tiles, diagonals count as 1) are turned back into lowlands
+SHORE_MAX_DISTANCE = 4
+
+
+def as_array(grid: Grid) -> np.ndarray:
+    """
+    Get a (height, width) NumPy array for a grid.  ArrayGrids return their backing array, any other Grid is copied
+    :param grid: Grid
+    :return: np.ndarray
+    """
+    if isinstance(grid, ArrayGrid):
+        return grid.array
+    return np.array([[grid[(x, y)] for x in range(grid.width)] for y in range(grid.height)])
+
+
+def thresholds_from_mapping(height_mapping: dict) -> np.ndarray:
+    """
+    Convert a height mapping dict (tile id => upper limit of that tile's height range) into a threshold table.  The
+    tile ids must run from 0 without gaps, the tile above the last id is the catch all for everything higher.
+    :param height_mapping: dict
+    :return: np.ndarray
+    """
+    if sorted(height_mapping.keys()) != list(range(len(height_mapping))):
+        raise ValueError(f"Height mapping keys must run from 0 to {len(height_mapping) - 1}: {height_mapping}")
+    return np.array([height_mapping[t_id] for t_id in range(len(height_mapping))], dtype=np.float64)
+
+
+def classify_heights(values: np.ndarray, thresholds) -> np.ndarray:
+    """
+    Classify an array of height values into tile ids in a single pass.
+
+    The threshold table holds the upper limit of each tile's range in ascending order, a value gets the id of the first
+    threshold it is below, or len(thresholds) if it isn't below any of them.  This is done with a binary search per
+    value, so the cost doesn't change with the number of tiers.
+    :param values: np.ndarray of height values
+    :param thresholds: ascending sequence of floats
+    :return: np.ndarray, TILE_DTYPE tile ids with the same shape as values
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    if np.any(np.diff(thresholds) < 0):
+        raise ValueError(f"Height thresholds must be in ascending order: {thresholds}")
+    return np.searchsorted(thresholds, values, side='right').astype(TILE_DTYPE)
+
+
+def dilate(mask: np.ndarray, radius=1) -> np.ndarray:
+    """
+    Grow a boolean mask by radius cells in every direction, including diagonals (a square structuring element).  Cells
+    past the edge of the array are treated as False, nothing wraps around.
+    :param mask: 2D boolean np.ndarray
+    :param radius: int
+    :return: np.ndarray
+    """
+    # a square element is separable, so grow along the rows then along the columns
+    out = mask.copy()
+    for shift in range(1, radius + 1):
+        out[:, shift:] |= mask[:, :-shift]
+        out[:, :-shift] |= mask[:, shift:]
+    rows = out.copy()
+    for shift in range(1, radius + 1):
+        out[shift:, :] |= rows[:-shift, :]
+        out[:-shift, :] |= rows[shift:, :]
+    return out
+
+
+def distance_to(mask: np.ndarray, max_distance: int) -> np.ndarray:
+    """
+    Distance transform, gives the distance from every cell to the nearest True cell of the mask.  Distance is measured
+    in steps including diagonals (chessboard distance).  Anything further than max_distance is set to max_distance + 1.
+    :param mask: 2D boolean np.ndarray
+    :param max_distance: int
+    :return: np.ndarray
+    """
+    dist = np.full(mask.shape, max_distance + 1, dtype=np.int32)
+    dist[mask] = 0
+    reached = mask
+    for step in range(1, max_distance + 1):
+        grown = dilate(reached)
+        dist[grown & ~reached] = step
+        reached = grown
+    return dist
+
+
+def cleanup_shoreline(tiles: np.ndarray) -> np.ndarray:
+    """
+    Shoreline cleanup stage, takes an array of tile ids and returns a cleaned copy.
+
+    - any tile next to water (including diagonals) that isn't water or shore becomes shore
+    - any tile next to shore that isn't water or shore becomes lowlands
+    - any shore tile more than SHORE_MAX_DISTANCE tiles from water becomes lowlands
+    :param tiles: 2D np.ndarray of tile ids
+    :return: np.ndarray
+    """
+    out = tiles.copy()
+    water = out == TILE_WATER
+    land = ~water & (out != TILE_SHORE)
+    out[dilate(water) & land] = TILE_SHORE
+    land = ~water & (out != TILE_SHORE)
+    out[dilate(out == TILE_SHORE) & land] = TILE_LOWLAND
+    out[(out == TILE_SHORE) & (distance_to(water, SHORE_MAX_DISTANCE) > SHORE_MAX_DISTANCE)] = TILE_LOWLAND
+    return out
+
+
+def run_pipeline(values: np.ndarray, *steps) -> np.ndarray:
+    """
+    Run an array through a list of stages, each stage is a callable that takes an array and returns a new one, for
+    example:
+
+    tiles = run_pipeline(noise, partial(classify_heights, thresholds=HEIGHT_THRESHOLDS), cleanup_shoreline)
+    :param values: np.ndarray
+    :param steps: callables
+    :return: np.ndarray
+    """
+    for step in steps:
+        values = step(values)
+    return values
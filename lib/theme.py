@@ -0,0 +1,95 @@
+"""
+GUI theme module
+
+Every scene has its own UIManager, and by default every UIManager parses the theme file, loads its fonts and images and
+builds its shadow and surface caches.  All of our scenes use the same theme, so this module loads it once and hands the
+same theme object to every manager it creates.
+
+The theme is kept until invalidate_theme is called, managers created after that get a freshly loaded theme.  Managers
+that already exist keep the old one until they're rebuilt.
+"""
+import logging
+import os
+import sys
+from pygame_gui import UIManager
+from pygame_gui.core import UIAppearanceTheme
+from pygame_gui.core.resource_loaders import BlockingThreadedResourceLoader
+from localpaths import GUI_THEME_FILE
+
+
+__all__ = ['get_theme', 'create_ui_manager', 'invalidate_theme', 'theme_file_changed']
+
+
+# theme file path => (theme, resource loader, file modified time when loaded)
+_themes = {}
+
+
+def get_theme(theme_file: str = GUI_THEME_FILE) -> UIAppearanceTheme:
+    """
+    Get the shared theme for a theme file, loading it the first time
+    :param theme_file: str path to the theme JSON
+    :return: UIAppearanceTheme
+    """
+    return _load_theme(theme_file)[0]
+
+
+def _load_theme(theme_file: str) -> tuple:
+    cached = _themes.get(theme_file)
+    if cached is not None:
+        return cached
+    logging.debug(f"Loading GUI theme {theme_file}")
+    resource_loader = BlockingThreadedResourceLoader()
+    theme = UIAppearanceTheme(resource_loader)
+    theme.load_theme(theme_file)
+    # the theme queued up its fonts and images on the loader, load them now the same way UIManager would
+    resource_loader.start()
+    resource_loader.update()
+    _themes[theme_file] = (theme, resource_loader, os.path.getmtime(theme_file))
+    return _themes[theme_file]
+
+
+def create_ui_manager(window_resolution, theme_file: str = GUI_THEME_FILE) -> UIManager:
+    """
+    Create a UIManager that uses the shared theme rather than loading its own copy
+    :param window_resolution: Tuple[int, int]
+    :param theme_file: str path to the theme JSON
+    :return: UIManager
+    """
+    theme, resource_loader, _ = _load_theme(theme_file)
+    # pygame_gui 0.5 always builds a new UIAppearanceTheme in UIManager.__init__ and has no argument to pass one in,
+    # so point the constructor at the shared theme while the manager is built
+    ui_manager_module = sys.modules[UIManager.__module__]
+    theme_class = ui_manager_module.UIAppearanceTheme
+    ui_manager_module.UIAppearanceTheme = lambda _: theme
+    try:
+        # live theme updates are off, one manager reloading the shared theme would leave the rest with stale elements
+        manager = UIManager(window_resolution, None, enable_live_theme_updates=False,
+                            resource_loader=resource_loader)
+    finally:
+        ui_manager_module.UIAppearanceTheme = theme_class
+    return manager
+
+
+def invalidate_theme(theme_file: str = None) -> None:
+    """
+    Throw away a loaded theme so the next manager created loads it again
+    :param theme_file: str path to the theme JSON, None drops every loaded theme
+    :return: None
+    """
+    if theme_file is None:
+        _themes.clear()
+    else:
+        _themes.pop(theme_file, None)
+    logging.debug(f"GUI theme cache invalidated for {theme_file or 'all themes'}")
+
+
+def theme_file_changed(theme_file: str = GUI_THEME_FILE) -> bool:
+    """
+    Check if a theme file was modified since it was loaded
+    :param theme_file: str path to the theme JSON
+    :return: bool, False if the theme isn't loaded
+    """
+    cached = _themes.get(theme_file)
+    if cached is None:
+        return False
+    return os.path.getmtime(theme_file) != cached[2]
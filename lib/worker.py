@@ -0,0 +1,121 @@
+"""
+Background worker module
+
+Runs long jobs (map generation and the like) on a background thread so the game loop keeps running while they work.
+Jobs report back to the game through the event bus, a worker is set up with the event types it should post for
+progress, completion, cancellation and failure.  Every event carries the job_id of the job that posted it so a
+listener can tell a stale job's events from the current one.
+
+A job is any callable that takes a progress callback as its first argument.  The job calls progress(fraction) as it
+works, which posts a progress event and is also the point where a cancelled job stops, progress raises JobCancelled
+once the job has been cancelled.
+"""
+import logging
+import threading
+from itertools import count
+from lib.eventbus import post_event
+
+
+__all__ = ['JobCancelled', 'BackgroundWorker']
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job by its progress callback once the job has been cancelled
+    """
+    pass
+
+
+class _Job(object):
+
+    def __init__(self, job_id: int, worker: 'BackgroundWorker'):
+        self.job_id = job_id
+        self.worker = worker
+        self.cancel_flag = threading.Event()
+        self.thread = None
+
+    def progress(self, fraction: float) -> None:
+        if self.cancel_flag.is_set():
+            raise JobCancelled()
+        post_event(self.worker.progress_event, job_id=self.job_id, progress=fraction)
+
+
+class BackgroundWorker(object):
+    """
+    Runs jobs on background threads and posts their results through the event bus.
+
+    Only one job is current at a time, submitting a new job cancels the one that's running, which is what we want when
+    the inputs to a job change (a new seed or map size makes the old map useless).
+
+    Example:
+
+    worker = BackgroundWorker(MAP_GEN_PROGRESS, MAP_GEN_COMPLETE, MAP_GEN_CANCELLED, MAP_GEN_FAILED)
+    job_id = worker.submit(generate_map, 256, 'seed')
+
+    posts MAP_GEN_PROGRESS events with job_id and progress attributes, then a MAP_GEN_COMPLETE event with job_id and
+    result attributes.
+    """
+
+    _job_ids = count(1)
+
+    def __init__(self, progress_event: int, complete_event: int, cancelled_event: int, failed_event: int):
+        self.progress_event = progress_event
+        self.complete_event = complete_event
+        self.cancelled_event = cancelled_event
+        self.failed_event = failed_event
+        self._current = None
+
+    @property
+    def current_job(self):
+        """
+        ID of the current job, or None if there isn't one running
+        """
+        if self._current is None:
+            return None
+        return self._current.job_id
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None and self._current.thread.is_alive()
+
+    def submit(self, func: callable, *args, **kwargs) -> int:
+        """
+        Start a job, cancelling the current job if there is one
+        :param func: callable, called as func(progress, *args, **kwargs)
+        :return: int, the job ID
+        """
+        self.cancel()
+        job = _Job(next(self._job_ids), self)
+        job.thread = threading.Thread(target=self._run, args=(job, func, args, kwargs), daemon=True,
+                                      name=f"BackgroundWorker-{job.job_id}")
+        self._current = job
+        logging.debug(f"Background job {job.job_id} starting")
+        job.thread.start()
+        return job.job_id
+
+    def cancel(self) -> None:
+        """
+        Cancel the current job, it stops the next time it reports progress and posts a cancelled event
+        :return: None
+        """
+        if self._current is not None:
+            logging.debug(f"Background job {self._current.job_id} cancelled")
+            self._current.cancel_flag.set()
+            self._current = None
+
+    def _run(self, job: _Job, func: callable, args: tuple, kwargs: dict):
+        try:
+            result = func(job.progress, *args, **kwargs)
+        except JobCancelled:
+            post_event(self.cancelled_event, job_id=job.job_id)
+            return None
+        except Exception as e:
+            logging.exception(f"Background job {job.job_id} failed")
+            post_event(self.failed_event, job_id=job.job_id, error=e)
+            return None
+        if job.cancel_flag.is_set():
+            # cancelled after the last progress check, the result is stale
+            post_event(self.cancelled_event, job_id=job.job_id)
+        else:
+            logging.debug(f"Background job {job.job_id} complete")
+            post_event(self.complete_event, job_id=job.job_id, result=result)
@@ -2,7 +2,7 @@ from os import path
 
 
 __all__ = ['ROOT_DIR', 'RES_DIR', 'THEME_DIR', 'SETTINGS_FILE', 'LOG_FILE', 'SAVE_DIR', 'MAPS_DIR', 'IMG_DIR',
-           'GUI_THEME_FILE', 'MASTER_MAP_FILE', 'SYSTEM_INFO_FILE']
+           'GUI_THEME_FILE', 'MASTER_MAP_FILE', 'SYSTEM_INFO_FILE', 'CACHE_DIR', 'PROFILE_DIR']
 
 
 # build root path from our files path, as this file should always be in the root directory
@@ -17,3 +17,5 @@ IMG_DIR = path.join(RES_DIR, 'images')
 GUI_THEME_FILE = path.join(THEME_DIR, 'default.json')
 MASTER_MAP_FILE = path.join(MAPS_DIR, 'master.json')
 SYSTEM_INFO_FILE = path.join(RES_DIR, 'system.json')
+CACHE_DIR = path.join(RES_DIR, 'cache')
+PROFILE_DIR = path.join(RES_DIR, 'profiles')
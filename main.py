@@ -1,7 +1,11 @@
-from startup import init_dependencies
+from time import perf_counter
+START_TIME = perf_counter()
+from startup import init_dependencies, startup_timer
 from game import GameController
 
 if __name__ == '__main__':
+    startup_timer.begin(START_TIME)
+    startup_timer.mark('imports')
     init_dependencies()
     gc = GameController()
     gc.run()
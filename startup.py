@@ -1,11 +1,70 @@
 import logging
+import os
 import pygame
-from localpaths import LOG_FILE, SETTINGS_FILE
+from time import perf_counter
+from localpaths import LOG_FILE, SETTINGS_FILE, SYSTEM_INFO_FILE
 from lib.config import set_param
-from lib.fileutil import read_from_json_file
+from lib.fileutil import read_from_json_file, write_json_to_file
 
 
-__all__ = ['init_dependencies', 'load_settings']
+__all__ = ['init_dependencies', 'load_settings', 'load_system_info', 'StartupTimer', 'startup_timer']
+
+
+class StartupTimer(object):
+    """
+    StartupTimer - version 1.0
+
+    Records how long each step of startup takes, from main.py being run to the first frame being shown, and logs a
+    report once startup is done.
+
+    Attributes
+    ----------
+    origin : float
+        perf_counter value startup is measured from
+    marks : List[Tuple[str, float]]
+        step names and the perf_counter value each step finished at
+    reported : bool
+        True once the report has been logged
+
+    Methods
+    -------
+    begin(float) : None
+        sets the origin, main.py passes in the time it started at
+    mark(str) : None
+        records the end of a step
+    report() : str
+        logs the step timings and returns the report text
+    """
+
+    def __init__(self):
+        self.origin = perf_counter()
+        self.marks = []
+        self.reported = False
+
+    def begin(self, origin: float) -> None:
+        self.origin = origin
+
+    def mark(self, step: str) -> None:
+        self.marks.append((step, perf_counter()))
+
+    def report(self) -> str:
+        lines = ["Startup timing:"]
+        last = self.origin
+        for step, at in self.marks:
+            lines.append(f"  {step:<24}{(at - last) * 1000:>9.1f} ms")
+            last = at
+        lines.append(f"  {'total':<24}{(last - self.origin) * 1000:>9.1f} ms")
+        report = "\n".join(lines)
+        logging.info(report)
+        self.reported = True
+        return report
+
+
+# the startup timer, main.py resets the origin to the moment it started
+startup_timer = StartupTimer()
+
+# probed system information, loaded once per run
+_system_info = None
 
 
 def init_dependencies():
@@ -25,10 +84,54 @@ def init_dependencies():
     )
     log_h.setFormatter(log_fmt)
     logger.addHandler(log_h)
+    startup_timer.mark('logging')
     # initialize PyGame
     pygame.init()
+    startup_timer.mark('pygame.init')
     # populate configuration parameters
     load_settings()
+    startup_timer.mark('settings')
+
+
+def load_system_info() -> dict:
+    """
+    Get information about the system we're running on, at the moment that's the supported display modes.  Probing is
+    slow so the result is cached in SYSTEM_INFO_FILE and only probed again when the pygame/SDL version, the video
+    driver or the desktop size of any display changes (a new monitor has new modes).  Within a run the info is only
+    loaded once.
+    :return: dict
+    """
+    global _system_info
+    if _system_info is not None:
+        return _system_info
+    probe_key = {
+        'pygame': pygame.version.ver,
+        'sdl': '.'.join(str(v) for v in pygame.get_sdl_version()),
+        'driver': pygame.display.get_driver(),
+        # lists rather than tuples so the key compares equal once it's been through JSON
+        'desktops': [list(size) for size in pygame.display.get_desktop_sizes()]
+    }
+    if os.path.isfile(SYSTEM_INFO_FILE):
+        try:
+            system_info = read_from_json_file(SYSTEM_INFO_FILE)
+            if system_info.get('probe_key') == probe_key:
+                _system_info = system_info
+                return _system_info
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"System info file {SYSTEM_INFO_FILE} could not be read, probing again: {e}")
+    logging.debug("Probing system information")
+    modes = pygame.display.list_modes()
+    # list_modes returns -1 when any size will do, there's nothing to list in that case
+    if modes == -1:
+        modes = []
+    # remove duplicates by converting to a set, then back to a list and sort it
+    display_modes = sorted(set(tuple(mode) for mode in modes))
+    _system_info = {'probe_key': probe_key, 'display_modes': [list(mode) for mode in display_modes]}
+    try:
+        write_json_to_file(_system_info, SYSTEM_INFO_FILE)
+    except OSError as e:
+        logging.warning(f"System info could not be written to {SYSTEM_INFO_FILE}: {e}")
+    return _system_info
 
 
 def load_settings():
@@ -42,11 +145,15 @@ def load_settings():
         else:
             set_param('display_full_screen_value', 'Off')
         set_param('current_display_size', f"{settings_data['display']['width']}x{settings_data['display']['height']}")
-    # we can now build our display sizes (system supported sizes
-    # remove duplicates by converting to a set, then back to a list
-    valid_display_sizes = list(set(pygame.display.list_modes()))
-    # sort it
-    valid_display_sizes.sort()
+        # only redraw what changed and skip idle frames, older settings files won't have this so default it on
+        set_param('dirty_rendering', settings_data.get('dirty_rendering', True))
+        # event listener timing, off unless asked for, slow listeners are logged when they go over the budget
+        set_param('event_instrumentation', settings_data.get('event_instrumentation', False))
+        set_param('event_budget_ms', settings_data.get('event_budget_ms', 8.0))
+        # time per frame the scheduler may spend on jobs
+        set_param('job_budget_ms', settings_data.get('job_budget_ms', 4.0))
+    # we can now build our display sizes (system supported sizes), these are probed once and cached
+    valid_display_sizes = load_system_info()['display_modes']
     valid_display_sizes_str = [f"{w}x{h}" for w, h in valid_display_sizes]
     set_param('display_sizes', valid_display_sizes_str)
     # setup some of our display parameters
@@ -0,0 +1,50 @@
+"""
+Checks for the fixed timestep simulation accumulator
+"""
+import random
+from game.controller import step_accumulator, GameController
+
+# a power of two step keeps the sums exact, the real rate only changes the numbers
+STEP = 1 / 32
+MAX_TICKS = GameController.MAX_CATCH_UP_TICKS
+
+
+def _run_frames(frames: int, frame_time: float, speed: int) -> int:
+    accumulator, total = 0.0, 0
+    for _ in range(frames):
+        ticks, accumulator, dropped = step_accumulator(accumulator, frame_time * speed, STEP, MAX_TICKS * speed)
+        assert dropped == 0
+        total += ticks
+    return total
+
+
+def test_ticks_follow_game_speed():
+    # one second of 64 fps frames
+    for speed in GameController.GAME_SPEEDS:
+        assert _run_frames(64, 1 / 64, speed) == 32 * speed
+
+
+def test_partial_steps_carry_over():
+    ticks, accumulator, _ = step_accumulator(0.0, STEP * 0.75, STEP, MAX_TICKS)
+    assert (ticks, accumulator) == (0, STEP * 0.75)
+    ticks, accumulator, _ = step_accumulator(accumulator, STEP * 0.75, STEP, MAX_TICKS)
+    assert (ticks, accumulator) == (1, STEP * 0.5)
+
+
+def test_long_stall_is_clamped():
+    for speed in GameController.GAME_SPEEDS:
+        # a 10 second hitch
+        ticks, accumulator, dropped = step_accumulator(STEP / 2, 10.0 * speed, STEP, MAX_TICKS * speed)
+        assert ticks == MAX_TICKS * speed
+        # whole steps past the cap are dropped, only the part step is kept
+        assert dropped == 320 * speed - ticks
+        assert accumulator == STEP / 2
+
+
+def test_alpha_stays_below_one():
+    rng = random.Random(7)
+    accumulator = 0.0
+    for _ in range(10000):
+        frame_time = rng.choice((0.0, rng.uniform(0.0, 0.05), rng.uniform(0.0, 2.0)))
+        _, accumulator, _ = step_accumulator(accumulator, frame_time, 1 / 30, MAX_TICKS)
+        assert 0.0 <= accumulator / (1 / 30) < 1.0
@@ -0,0 +1,193 @@
+"""
+Checks for the event bus
+"""
+import pytest
+import lib.eventbus
+from lib.base import GameScene
+from lib.eventbus import bind_listener, unbind_listener, bind_element, unbind_element, clear_listeners, post_event, process_event_queue, \
+    pending_event_count, register_new_event, Coalesce, COALESCE_LATEST, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+
+EVENT_A = register_new_event()
+EVENT_B = register_new_event()
+
+
+@pytest.fixture
+def received():
+    events = []
+    yield events
+    clear_listeners()
+    # drop anything a test left queued
+    while pending_event_count():
+        process_event_queue()
+
+
+def _record(received: list):
+    def on_event(event):
+        received.append((event.type, event.tag))
+    return on_event
+
+
+def test_queue_dispatches_by_priority(received):
+    bind_listener(_record(received), EVENT_A, EVENT_B)
+    post_event(EVENT_A, priority=PRIORITY_LOW, tag='low')
+    post_event(EVENT_B, tag='normal')
+    post_event(EVENT_A, priority=PRIORITY_HIGH, tag='high')
+    post_event(EVENT_B, priority=PRIORITY_NORMAL, tag='normal 2')
+    assert process_event_queue() == 4
+    assert [tag for _, tag in received] == ['high', 'normal', 'normal 2', 'low']
+
+
+def test_queue_keeps_post_order_within_a_priority(received):
+    bind_listener(_record(received), EVENT_A, EVENT_B)
+    for i in range(5):
+        post_event(EVENT_A if i % 2 else EVENT_B, priority=PRIORITY_LOW, tag=i)
+    process_event_queue()
+    assert [tag for _, tag in received] == [0, 1, 2, 3, 4]
+
+
+def test_events_posted_during_dispatch_wait_for_the_next_batch(received):
+    def on_a(event):
+        received.append((event.type, event.tag))
+        # even a high priority event posted by a listener isn't dispatched in the batch that's running
+        post_event(EVENT_B, priority=PRIORITY_HIGH, tag=f"from {event.tag}")
+
+    bind_listener(on_a, EVENT_A)
+    bind_listener(_record(received), EVENT_B)
+    post_event(EVENT_A, tag='first')
+    post_event(EVENT_A, priority=PRIORITY_LOW, tag='second')
+    assert process_event_queue() == 2
+    assert received == [(EVENT_A, 'first'), (EVENT_A, 'second')]
+    assert pending_event_count() == 2
+    assert process_event_queue() == 2
+    assert received[2:] == [(EVENT_B, 'from first'), (EVENT_B, 'from second')]
+
+
+def test_priority_is_keyword_only():
+    with pytest.raises(TypeError):
+        post_event(EVENT_A, PRIORITY_HIGH)
+
+
+def test_coalesce_latest_delivers_the_newest_event_once(received):
+    bind_listener(_record(received), EVENT_A, coalesce=COALESCE_LATEST)
+    for i in range(4):
+        post_event(EVENT_A, tag=i)
+    process_event_queue()
+    assert received == [(EVENT_A, 3)]
+    # nothing new, nothing delivered
+    process_event_queue()
+    assert received == [(EVENT_A, 3)]
+
+
+def test_coalesce_merges_deltas(received):
+    def on_motion(event):
+        received.append((event.rel, event.pos))
+
+    bind_listener(on_motion, EVENT_A, coalesce=Coalesce(merge=('rel',)))
+    post_event(EVENT_A, rel=(1, 2), pos=(10, 10))
+    post_event(EVENT_A, rel=(3, -1), pos=(13, 9))
+    post_event(EVENT_A, rel=(-2, 4), pos=(11, 13))
+    process_event_queue()
+    # deltas are summed, everything else comes from the newest event
+    assert received == [((2, 5), (11, 13))]
+
+
+def test_coalesce_throttles_to_hz(received, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(lib.eventbus, 'perf_counter', lambda: clock[0])
+    bind_listener(_record(received), EVENT_A, coalesce=Coalesce(hz=4))
+    post_event(EVENT_A, tag='first')
+    process_event_queue()
+    assert received == [(EVENT_A, 'first')]
+    # inside the interval the newest event is held back, not dropped
+    clock[0] += 0.125
+    post_event(EVENT_A, tag='second')
+    post_event(EVENT_A, tag='third')
+    process_event_queue()
+    assert len(received) == 1
+    clock[0] += 0.125
+    process_event_queue()
+    assert received[1:] == [(EVENT_A, 'third')]
+
+
+def test_coalescers_flush_in_bind_order(received):
+    listeners = [_record(received) for _ in range(8)]
+    for i, listener in enumerate(listeners):
+        # the event type doesn't decide the order, the bind does
+        bind_listener(listener, EVENT_B if i % 2 else EVENT_A, coalesce=COALESCE_LATEST)
+    post_event(EVENT_A, tag='a')
+    post_event(EVENT_B, tag='b')
+    process_event_queue()
+    assert [tag for _, tag in received] == ['a', 'b'] * 4
+    unbind_listener(listeners[0], EVENT_A)
+    post_event(EVENT_B, tag='b')
+    post_event(EVENT_A, tag='a')
+    process_event_queue()
+    assert [tag for _, tag in received[8:]] == ['b', 'a', 'b', 'a', 'b', 'a', 'b']
+
+
+class _Element(object):
+    # stands in for a pygame_gui element, routing only needs something hashable
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+def _record_element(received: list, name: str):
+    def on_element_event(event):
+        received.append((name, event.ui_element.name))
+    return on_element_event
+
+
+def test_element_events_only_reach_their_element(received):
+    ok, cancel = _Element('ok'), _Element('cancel')
+    bind_element(_record_element(received, 'ok handler'), ok, EVENT_A)
+    bind_element(_record_element(received, 'cancel handler'), cancel, EVENT_A)
+    post_event(EVENT_A, ui_element=ok)
+    post_event(EVENT_A, ui_element=cancel)
+    # same element, other event type
+    post_event(EVENT_B, ui_element=ok)
+    process_event_queue()
+    assert received == [('ok handler', 'ok'), ('cancel handler', 'cancel')]
+
+
+def test_unbind_element_drops_handler_and_coalescer(received):
+    slider = _Element('slider')
+    on_slide = _record_element(received, 'slide handler')
+    bind_element(on_slide, slider, EVENT_A, coalesce=COALESCE_LATEST)
+    assert len(lib.eventbus._coalescers) == 1
+    post_event(EVENT_A, ui_element=slider)
+    process_event_queue()
+    assert received == [('slide handler', 'slider')]
+    # an event collected before the unbind isn't delivered after it
+    bind_listener(lambda event: unbind_element(on_slide, slider, EVENT_A), EVENT_B)
+    post_event(EVENT_A, ui_element=slider)
+    post_event(EVENT_B)
+    process_event_queue()
+    assert received == [('slide handler', 'slider')]
+    assert not lib.eventbus._coalescers
+    assert (EVENT_A, slider) not in lib.eventbus._element_listeners
+
+
+def test_unbound_elements_fall_through_to_type_listeners(received):
+    bound, unbound = _Element('bound'), _Element('unbound')
+    bind_element(_record_element(received, 'element handler'), bound, EVENT_A)
+    bind_listener(_record_element(received, 'type handler'), EVENT_A)
+    post_event(EVENT_A, ui_element=unbound)
+    post_event(EVENT_A, ui_element=bound)
+    process_event_queue()
+    # type level listeners see every element's events, element listeners only their own
+    assert received == [('type handler', 'unbound'), ('type handler', 'bound'), ('element handler', 'bound')]
+
+
+def test_scene_element_binds_end_with_the_scene(received):
+    scene = GameScene(None, 'test')
+    scene.ui_elements['btn_ok'] = ok = _Element('ok')
+    scene.bind_element_listener('btn_ok', _record_element(received, 'scene handler'), EVENT_A)
+    post_event(EVENT_A, ui_element=ok)
+    process_event_queue()
+    scene.on_exit()
+    post_event(EVENT_A, ui_element=ok)
+    process_event_queue()
+    assert received == [('scene handler', 'ok')]
+    assert not lib.eventbus._element_listeners
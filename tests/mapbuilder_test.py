@@ -0,0 +1,21 @@
+"""
+Checks for map generation
+"""
+import numpy as np
+from lib.mapbuilder import generate_noise_grid
+from lib.noisefield import noise_grid, pnoise2_array, snoise2_array
+
+
+def test_parallel_noise_grid_matches_serial():
+    # tiles smaller than the grid, and a grid that doesn't divide into them evenly, so the stitching is exercised
+    for noise_func, kwargs in ((pnoise2_array, {'octaves': 4}), (snoise2_array, {'octaves': 3, 'repeatx': 32})):
+        serial = noise_grid(noise_func, 90, 70, 12, -7, 0.1, workers=1, **kwargs)
+        parallel = noise_grid(noise_func, 90, 70, 12, -7, 0.1, workers=3, tile_size=32, **kwargs)
+        assert parallel.dtype == serial.dtype
+        np.testing.assert_array_equal(parallel, serial)
+
+
+def test_parallel_generate_noise_grid_matches_serial():
+    serial = generate_noise_grid(300, 260, seed=12345, workers=1)
+    parallel = generate_noise_grid(300, 260, seed=12345, workers=2)
+    np.testing.assert_array_equal(parallel.array, serial.array)
@@ -0,0 +1,48 @@
+"""
+Checks for the two level map cache
+"""
+import os
+import numpy as np
+import pytest
+from lib.mapcache import MapCache
+
+
+def test_memory_only_put_skips_disk(tmp_path):
+    cache = MapCache(cache_dir=str(tmp_path))
+    cache.put('height', np.zeros((8, 8), dtype=np.uint8), disk=False)
+    assert cache.get('height') is not None
+    assert not os.path.exists(cache.cache_dir) or not os.listdir(cache.cache_dir)
+
+
+def test_disk_budget_evicts_oldest(tmp_path):
+    array = np.zeros((64, 64), dtype=np.float32)
+    cache = MapCache(memory_budget=0, cache_dir=str(tmp_path))
+    cache.put('noise0', array)
+    # room for three files, .npy files have a header on top of the array data
+    cache.disk_budget = 3 * os.path.getsize(cache._path('noise0'))
+    os.utime(cache._path('noise0'), (0, 0))
+    for i in range(1, 5):
+        cache.put(f"noise{i}", array)
+        # modified times can be too coarse to order writes this quick, space them out
+        os.utime(cache._path(f"noise{i}"), (i, i))
+    cache.put('noise5', array)
+    kept = sorted(name[:-4] for name in os.listdir(cache.cache_dir))
+    assert kept == ['noise3', 'noise4', 'noise5']
+    # evicted entries are gone from disk, kept ones still load after the memory tier is cleared
+    cache.clear()
+    assert cache.get('noise0') is None
+    assert cache.get('noise4') is not None
+
+
+def test_cached_arrays_are_read_only(tmp_path):
+    array = np.zeros((8, 8), dtype=np.uint8)
+    cache = MapCache(cache_dir=str(tmp_path))
+    cache.put('height', array)
+    with pytest.raises(ValueError):
+        cache.get('height')[0, 0] = 1
+    # arrays loaded back from the disk tier are read only too
+    cache.clear()
+    loaded = cache.get('height')
+    assert not loaded.flags.writeable
+    with pytest.raises(ValueError):
+        loaded[0, 0] = 1
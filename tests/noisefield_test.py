@@ -0,0 +1,52 @@
+"""
+Checks the batched noise functions against the noise C module they replace
+"""
+import numpy as np
+import pytest
+import noise
+from lib.noisefield import pnoise2_array, snoise2_array, noise_grid
+
+
+# no repeat, one axis, the other axis and both, simplex noise switches to 2D/3D/3D/4D noise for these
+REPEATS = [{}, {'repeatx': 16}, {'repeaty': 16}, {'repeatx': 16, 'repeaty': 24}]
+# square and non-square, a non-square grid catches swapped axes
+SIZES = [(32, 32), (40, 23)]
+
+
+def _coords(width: int, height: int):
+    xs = np.arange(width) * 0.13 + 3.1
+    ys = np.arange(height) * 0.07 - 2.2
+    return xs, ys
+
+
+@pytest.mark.parametrize('repeat', REPEATS)
+@pytest.mark.parametrize('size', SIZES)
+def test_snoise2_array_matches_snoise2(repeat, size):
+    xs, ys = _coords(*size)
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    values = snoise2_array(grid_x, grid_y, octaves=3, **repeat)
+    expected = [[noise.snoise2(float(x), float(y), octaves=3, **repeat) for x in xs] for y in ys]
+    assert values.shape == (size[1], size[0])
+    np.testing.assert_allclose(values, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize('repeat', REPEATS)
+@pytest.mark.parametrize('size', SIZES)
+def test_pnoise2_array_matches_pnoise2(repeat, size):
+    # pnoise2 always repeats, 1024 is its default
+    repeat = {'repeatx': repeat.get('repeatx', 1024), 'repeaty': repeat.get('repeaty', 1024)}
+    xs, ys = _coords(*size)
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    values = pnoise2_array(grid_x, grid_y, octaves=3, **repeat)
+    expected = [[noise.pnoise2(float(x), float(y), octaves=3, **repeat) for x in xs] for y in ys]
+    assert values.shape == (size[1], size[0])
+    np.testing.assert_allclose(values, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize('repeat', REPEATS)
+def test_noise_grid_matches_snoise2(repeat):
+    width, height, offset, scale = 37, 21, 5, 0.08
+    values = noise_grid(snoise2_array, width, height, offset, offset, scale, octaves=2, **repeat)
+    expected = [[noise.snoise2((x + offset) * scale, (y + offset) * scale, octaves=2, **repeat)
+                 for x in range(width)] for y in range(height)]
+    np.testing.assert_allclose(values, expected, atol=1e-5)
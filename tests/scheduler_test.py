@@ -0,0 +1,110 @@
+"""
+Checks for the cooperative job scheduler
+"""
+import pytest
+from lib.eventbus import bind_listener, unbind_listener, process_event_queue
+from lib.const import JOB_COMPLETE, JOB_CANCELLED, JOB_FAILED
+from lib.scheduler import Scheduler, PRIORITY_HIGH
+
+
+@pytest.fixture
+def job_events():
+    events = []
+
+    def on_job_event(event):
+        events.append((event.type, event.job_id))
+
+    for event_type in (JOB_COMPLETE, JOB_CANCELLED, JOB_FAILED):
+        bind_listener(on_job_event, event_type)
+    yield events
+    for event_type in (JOB_COMPLETE, JOB_CANCELLED, JOB_FAILED):
+        unbind_listener(on_job_event, event_type)
+
+
+def _counter(steps: int, log: list, tag: str):
+    for i in range(steps):
+        log.append(tag)
+        yield (i + 1) / steps
+    return tag
+
+
+def test_priority_and_turns(job_events):
+    scheduler, log = Scheduler(budget_ms=1000), []
+    low_a = scheduler.submit(_counter(2, log, 'a'))
+    low_b = scheduler.submit(_counter(2, log, 'b'))
+    high = scheduler.submit(_counter(2, log, 'h'), PRIORITY_HIGH)
+    scheduler.run()
+    process_event_queue()
+    assert log == ['h', 'h', 'a', 'b', 'a', 'b']
+    assert job_events == [(JOB_COMPLETE, high), (JOB_COMPLETE, low_a), (JOB_COMPLETE, low_b)]
+    assert not scheduler.busy
+
+
+def test_job_cancels_itself(job_events):
+    scheduler, log = Scheduler(budget_ms=1000), []
+    closed = []
+
+    def cancels_itself():
+        try:
+            log.append('step')
+            scheduler.cancel(job_id)
+            yield 0.5
+            log.append('never')
+        finally:
+            closed.append(True)
+
+    job_id = scheduler.submit(cancels_itself())
+    other = scheduler.submit(_counter(2, log, 'o'))
+    scheduler.run()
+    process_event_queue()
+    assert log == ['step', 'o', 'o']
+    assert closed == [True]
+    assert job_events == [(JOB_CANCELLED, job_id), (JOB_COMPLETE, other)]
+    assert not scheduler.busy
+
+
+def test_job_cancels_itself_on_last_step(job_events):
+    scheduler = Scheduler(budget_ms=1000)
+
+    def cancels_and_returns():
+        scheduler.cancel(job_id)
+        return 'done'
+        yield
+
+    job_id = scheduler.submit(cancels_and_returns())
+    scheduler.run()
+    process_event_queue()
+    assert job_events == [(JOB_CANCELLED, job_id)]
+
+
+def test_job_cancels_another_job(job_events):
+    scheduler, log = Scheduler(budget_ms=1000), []
+
+    def cancels_other():
+        yield 0.5
+        scheduler.cancel(victim)
+        log.append('cancelled')
+
+    killer = scheduler.submit(cancels_other(), PRIORITY_HIGH)
+    victim = scheduler.submit(_counter(5, log, 'v'))
+    scheduler.run()
+    process_event_queue()
+    assert log == ['cancelled']
+    assert job_events == [(JOB_CANCELLED, victim), (JOB_COMPLETE, killer)]
+    assert not scheduler.busy
+    # the cancelled job's queue entry is gone too
+    assert scheduler.run() == 0
+    assert not scheduler._queue
+
+
+def test_failed_job(job_events):
+    scheduler = Scheduler(budget_ms=1000)
+
+    def fails():
+        yield
+        raise RuntimeError("boom")
+
+    job_id = scheduler.submit(fails())
+    scheduler.run()
+    process_event_queue()
+    assert job_events == [(JOB_FAILED, job_id)]
@@ -0,0 +1,148 @@
+"""
+Checks for the NumPy backed grids
+"""
+import os
+import numpy as np
+import pytest
+from pygame import Rect
+from lib.structure import ArrayGrid, ChunkedGrid, RectGrid
+
+
+def test_array_copy_does_not_alias_grid():
+    grid = ArrayGrid(4, 3)
+    for copied in (np.array(grid), np.array(grid, copy=True), np.array(grid, dtype=np.int32)):
+        copied[0, 0] = 9
+        assert grid[0, 0] == 0
+
+
+def test_asarray_shares_grid():
+    grid = ArrayGrid(4, 3)
+    np.asarray(grid)[2, 1] = 5
+    assert grid[1, 2] == 5
+
+
+@pytest.fixture
+def chunked():
+    # 4x4 chunks of one byte cells, room for two chunks in memory
+    grid = ChunkedGrid(16, 12, chunk_size=4, dtype=np.uint8, fill=7, memory_budget=2 * 4 * 4)
+    yield grid
+    grid.close()
+
+
+def test_chunks_are_created_on_write(chunked):
+    assert chunked[5, 5] == 7
+    assert chunked.allocated_chunks == 0
+    chunked[5, 5] = 1
+    chunked[6, 7] = 2
+    # same chunk
+    assert chunked.allocated_chunks == 1
+    assert chunked.memory_used == 16
+    assert (chunked[5, 5], chunked[6, 7], chunked[4, 4]) == (1, 2, 7)
+
+
+def test_least_recently_used_chunk_is_evicted(chunked):
+    chunked[0, 0] = 1
+    chunked[4, 0] = 2
+    # touching the first chunk makes the second the oldest
+    assert chunked[0, 0] == 1
+    chunked[8, 0] = 3
+    assert chunked.allocated_chunks == 2
+    assert chunked.spilled_chunks == 1
+    assert list(chunked._spilled) == [(1, 0)]
+    # chunks holding only the fill value are dropped when they're evicted, not spilled
+    chunked[12, 0] = 7
+    chunked[0, 4] = 4
+    chunked[4, 4] = 5
+    assert sorted(chunked._spilled) == [(0, 0), (1, 0), (2, 0)]
+    assert chunked.memory_used <= chunked.memory_budget
+    assert chunked[12, 0] == 7
+
+
+def test_spilled_chunks_reload(chunked):
+    for i in range(3):
+        chunked[i * 4, 1] = i + 1
+    assert chunked.spilled_chunks == 1
+    path = next(iter(chunked._spilled.values()))
+    assert path.endswith('.npy') and os.path.isfile(path)
+    assert chunked[0, 1] == 1
+    # the reloaded chunk's file is removed, another chunk was spilled to make room
+    assert not os.path.isfile(path)
+    assert list(chunked._spilled) == [(1, 0)]
+    assert [chunked[i * 4, 1] for i in range(3)] == [1, 2, 3]
+
+
+def test_close_removes_spill_files(chunked):
+    for i in range(4):
+        chunked[i * 4, 0] = i + 1
+    paths = list(chunked._spilled.values())
+    spill_dir = chunked._tmp_dir
+    assert paths and all(os.path.isfile(path) for path in paths)
+    chunked.close()
+    assert not any(os.path.exists(path) for path in paths)
+    assert not os.path.exists(spill_dir)
+    assert chunked.allocated_chunks == chunked.spilled_chunks == 0
+
+
+def test_chunked_coordinates_outside_raise(chunked):
+    for coord in ((-1, 0), (0, -1), (16, 0), (0, 12)):
+        with pytest.raises(IndexError):
+            chunked[coord]
+        with pytest.raises(IndexError):
+            chunked[coord] = 1
+    assert chunked.allocated_chunks == 0
+
+
+@pytest.fixture
+def rects():
+    # 10x8 cells of 16x16 pixels
+    return RectGrid(10, 8, 16, 16, computed=True)
+
+
+def test_rect_grid_pixel_size(rects):
+    assert (rects.pixel_width, rects.pixel_height) == (160, 128)
+    assert rects[9, 7] == Rect(144, 112, 16, 16)
+    with pytest.raises(IndexError):
+        rects[10, 0]
+
+
+def test_rect_grid_cell_at(rects):
+    assert rects.cell_at(0, 0) == (0, 0)
+    # the far edge of a cell belongs to the next one
+    assert rects.cell_at(15, 15) == (0, 0)
+    assert rects.cell_at(16, 16) == (1, 1)
+    assert rects.cell_at(159, 127) == (9, 7)
+    for px, py in ((160, 0), (0, 128), (-1, 0), (0, -1), (-16, -16)):
+        assert rects.cell_at(px, py) is None
+
+
+def test_rect_grid_visible_range(rects):
+    # cells are included from the edge they start on, a rect ending exactly on an edge doesn't take the next cell
+    assert rects.visible_range(Rect(16, 32, 32, 16)) == (1, 2, 3, 3)
+    assert rects.visible_range(Rect(17, 33, 32, 16)) == (1, 2, 4, 4)
+    # negative offsets are clamped to the grid
+    assert rects.visible_range(Rect(-20, -20, 40, 40)) == (0, 0, 2, 2)
+    # a viewport bigger than the map covers the whole map
+    assert rects.visible_range(Rect(-100, -100, 1000, 1000)) == (0, 0, 10, 8)
+    for outside in (Rect(200, 0, 10, 10), Rect(-50, 0, 10, 10), Rect(0, -50, 10, 10)):
+        x0, y0, x1, y1 = rects.visible_range(outside)
+        assert x0 == x1 or y0 == y1
+        assert list(rects.iter_visible(outside)) == []
+
+
+def test_rect_grid_iteration_matches_stored(rects):
+    stored = RectGrid(10, 8, 16, 16)
+    assert list(rects.iter_range(2, 1, 5, 4)) == list(stored.iter_range(2, 1, 5, 4))
+    assert list(rects.iter_visible(Rect(16, 32, 32, 16))) == [(1, 2, Rect(16, 32, 16, 16)),
+                                                              (2, 2, Rect(32, 32, 16, 16))]
+    everything = list(rects.iter_visible(Rect(-100, -100, 1000, 1000)))
+    assert len(everything) == 80
+    assert everything[:2] == [(0, 0, Rect(0, 0, 16, 16)), (1, 0, Rect(16, 0, 16, 16))]
+    assert everything[-1] == (9, 7, Rect(144, 112, 16, 16))
+
+
+def test_rect_grid_is_read_only(rects):
+    for grid in (rects, RectGrid(2, 2, 16, 16)):
+        with pytest.raises(NotImplementedError):
+            grid[0, 0] = Rect(0, 0, 1, 1)
+        with pytest.raises(NotImplementedError):
+            del grid[0, 0]
@@ -0,0 +1,81 @@
+"""
+Checks for the terrain stages, small fixtures with the expected tiles written out
+"""
+import numpy as np
+from lib.const import TILE_WATER, TILE_SHORE, TILE_LOWLAND, TILE_MIDLAND, TILE_HILLS
+from lib.mapbuilder import HEIGHT_THRESHOLDS, map_height_value
+from lib.terrain import classify_heights, dilate, distance_to, cleanup_shoreline, SHORE_MAX_DISTANCE
+
+W, S, L, M, H = TILE_WATER, TILE_SHORE, TILE_LOWLAND, TILE_MIDLAND, TILE_HILLS
+
+
+def test_classify_heights_matches_map_height_value():
+    # every threshold exactly, and the closest values either side of it
+    values = []
+    for threshold in HEIGHT_THRESHOLDS:
+        values += [np.nextafter(threshold, 0.0), threshold, np.nextafter(threshold, 1.0)]
+    values += [0.0, 0.3, 0.75, 1.0]
+    tiles = classify_heights(np.array(values), HEIGHT_THRESHOLDS)
+    assert tiles.tolist() == [map_height_value(v) for v in values]
+
+
+def test_classify_heights_threshold_goes_to_next_tier():
+    tiles = classify_heights(np.array(HEIGHT_THRESHOLDS), HEIGHT_THRESHOLDS)
+    assert tiles.tolist() == list(range(1, len(HEIGHT_THRESHOLDS) + 1))
+
+
+def test_dilate_includes_diagonals_and_does_not_wrap():
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[0, 0] = True
+    expected = np.zeros((4, 5), dtype=bool)
+    expected[0:2, 0:2] = True
+    np.testing.assert_array_equal(dilate(mask), expected)
+    expected[0:3, 0:3] = True
+    np.testing.assert_array_equal(dilate(mask, radius=2), expected)
+
+
+def test_distance_to_is_chessboard_and_capped():
+    mask = np.zeros((1, 8), dtype=bool)
+    mask[0, 0] = True
+    assert distance_to(mask, 3).tolist() == [[0, 1, 2, 3, 4, 4, 4, 4]]
+    mask = np.zeros((3, 3), dtype=bool)
+    mask[1, 1] = True
+    np.testing.assert_array_equal(distance_to(mask, 2), np.where(mask, 0, 1))
+
+
+def test_cleanup_shoreline_shore_then_lowland_rings():
+    tiles = np.full((5, 5), H, dtype=np.uint8)
+    tiles[2, 2] = W
+    expected = np.array([[L, L, L, L, L],
+                         [L, S, S, S, L],
+                         [L, S, W, S, L],
+                         [L, S, S, S, L],
+                         [L, L, L, L, L]], dtype=np.uint8)
+    np.testing.assert_array_equal(cleanup_shoreline(tiles), expected)
+
+
+def test_cleanup_shoreline_keeps_water_and_existing_shore():
+    tiles = np.array([[W, S, M, M, M, M]], dtype=np.uint8)
+    assert cleanup_shoreline(tiles).tolist() == [[W, S, L, M, M, M]]
+
+
+def test_cleanup_shoreline_far_shore_becomes_lowland():
+    width = SHORE_MAX_DISTANCE + 4
+    tiles = np.full((1, width), S, dtype=np.uint8)
+    tiles[0, 0] = W
+    expected = [W] + [S] * SHORE_MAX_DISTANCE + [L] * (width - SHORE_MAX_DISTANCE - 1)
+    assert cleanup_shoreline(tiles).tolist() == [expected]
+
+
+def test_cleanup_shoreline_without_water():
+    tiles = np.array([[S, M], [M, M]], dtype=np.uint8)
+    # no water, the shore is too far from any and everything next to it becomes lowlands
+    assert cleanup_shoreline(tiles).tolist() == [[L, L], [L, L]]
+
+
+def test_cleanup_shoreline_leaves_input_alone():
+    tiles = np.full((3, 3), H, dtype=np.uint8)
+    tiles[0, 0] = W
+    before = tiles.copy()
+    cleanup_shoreline(tiles)
+    np.testing.assert_array_equal(tiles, before)
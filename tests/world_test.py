@@ -0,0 +1,82 @@
+"""
+Checks for the world and its tile store
+"""
+import numpy as np
+import pytest
+from game.world import World, Tile, TileManager, TYPE_PROPERTIES, STATE_PROPERTIES, TILE_GRASS, TILE_HILLS, \
+    TILE_MOUNTAINS, TILE_WATER
+from lib.mapcache import MapCache
+from lib.structure import ArrayGrid
+
+
+def test_world_edits_do_not_change_cached_map():
+    cache = MapCache(cache_dir=None)
+    cache.put('height', np.full((8, 8), 2, dtype=np.uint8))
+    # the random map scene hands the map view a grid wrapping the cached array
+    world = World(ArrayGrid.from_array(cache.get('height')))
+    world.set_tile(3, 4, 6)
+    assert world.map_grid[3, 4] == 6
+    assert world.get_tile(3, 4).get_type_id() == 6
+    assert (cache.get('height') == 2).all()
+
+
+def test_tile_view_follows_later_changes():
+    tiles = TileManager.create(8, 8, TILE_GRASS)
+    view = tiles.get(2, 3)
+    assert (view.get_type_id(), view.can_build, view.road_level, view.river_level) == (TILE_GRASS, True, 0, 0)
+    tiles.set_type(2, 3, TILE_MOUNTAINS)
+    tiles.set_property(2, 3, 'road_level', 2)
+    tiles.river_level[2, 3] = 1
+    assert (view.get_type(), view.can_build, view.road_level, view.river_level) == ('mountains', False, 2, 1)
+    # views of the same tile are equal and see each other's changes
+    assert tiles[2, 3] == view
+    tiles[2, 3].move_bonus = 9
+    assert view.move_bonus == 9
+
+
+def test_overrides_only_exist_while_needed():
+    tiles = TileManager.create(8, 8, TILE_GRASS)
+    view = tiles.get(1, 1)
+    # state properties and unchanged type properties never make an override
+    view.road_level = 3
+    view.can_build = True
+    assert tiles.override_count == 0
+    view.can_build = False
+    view.move_bonus = -1
+    assert tiles.override_count == 1
+    assert tiles.get(1, 2).can_build
+    # setting a property back to the type's value drops it, the override goes once it's empty
+    view.can_build = True
+    assert tiles.override_count == 1
+    view.move_bonus = Tile(TILE_GRASS, 0, 0).move_bonus
+    assert tiles.override_count == 0
+    view.can_grow = False
+    tiles.clear_overrides(1, 1)
+    assert tiles.override_count == 0
+    assert view.can_grow
+
+
+def test_get_tile_matches_tile_objects():
+    world = World.generate(32, 5)
+    names = TYPE_PROPERTIES + STATE_PROPERTIES
+    seen = set()
+    for y in range(world.map_grid.height):
+        for x in range(world.map_grid.width):
+            type_id = int(world.map_grid[x, y])
+            tile, view = Tile(type_id, x, y), world.get_tile(x, y)
+            assert (view.get_type_id(), view.get_type(), view.x, view.y) == \
+                   (tile.get_type_id(), tile.get_type(), tile.x, tile.y)
+            assert [getattr(view, name) for name in names] == [getattr(tile, name) for name in names]
+            seen.add(type_id)
+    # make sure the map wasn't all one type
+    assert len(seen) > 2
+    assert world.tiles.override_count == 0
+
+
+def test_get_tile_outside_the_map():
+    world = World(TileManager.create(4, 4, TILE_WATER).types)
+    world.set_tile(3, 3, TILE_HILLS)
+    assert world.get_tile(3, 3).get_type_id() == TILE_HILLS
+    for x, y in ((4, 0), (0, 4), (-1, 0)):
+        with pytest.raises(IndexError):
+            world.get_tile(x, y)